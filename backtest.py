@@ -0,0 +1,331 @@
+"""Vectorized WaveTrend/RSI backtest and signal scan over long candle histories.
+
+Computes full WT1/WT2/RSI series and cross / overbought / oversold event
+series for many symbols at once (one DataFrame column per symbol) using the
+same formulas as the live path in indicators.py, then summarizes how often
+each signal was followed by a move in the expected direction.
+
+Input files hold one candle per row with columns
+timestamp, open, high, low, close[, volume][, symbol] (CSV, CSV.gz or Parquet;
+timestamps in seconds or milliseconds). Files without a symbol column use the
+file name as the symbol. JSON dumps of websocket_client.candle_store
+({symbol: {timeframe: [candles]}}) are also accepted.
+
+Usage:
+    python backtest.py data/*.csv --timeframe 15m --horizons 4 16
+    python backtest.py data/*.parquet --scan-os -70 -60 -53 -45 --scan-ob 45 53 60 70
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from indicators import indicators, IndicatorConfig
+
+logger = logging.getLogger(__name__)
+
+PRICE_FIELDS = ['open', 'high', 'low', 'close', 'volume']
+
+# Pandas resample rules for the timeframes used by the live feed
+TIMEFRAME_RULES = {
+    '1m': '1min',
+    '5m': '5min',
+    '15m': '15min',
+    '1h': '1h',
+    '4h': '4h'
+}
+
+# Events and the price direction that counts as a hit (+1 up, -1 down)
+EVENT_DIRECTIONS = {
+    'cross_over': 1,
+    'cross_under': -1,
+    'cross_over_oversold': 1,
+    'cross_under_overbought': -1,
+    'enter_oversold1': 1,
+    'enter_oversold2': 1,
+    'enter_overbought1': -1,
+    'enter_overbought2': -1,
+}
+
+def _symbol_from_path(path: str) -> str:
+    name = os.path.basename(path)
+    for ext in ('.gz', '.csv', '.parquet', '.pq', '.json'):
+        if name.endswith(ext):
+            name = name[:-len(ext)]
+    return name
+
+def _load_candle_store_json(path: str, timeframe: str) -> pd.DataFrame:
+    with open(path) as f:
+        store = json.load(f)
+    frames = []
+    for symbol, timeframes in store.items():
+        candles = timeframes.get(timeframe) or []
+        if candles:
+            frame = pd.DataFrame(candles)
+            frame['symbol'] = symbol
+            frames.append(frame)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+def load_candles(paths: Iterable[str], timeframe: str = '1m') -> pd.DataFrame:
+    """Load candle files into one long DataFrame (symbol, timestamp, OHLCV)"""
+    frames = []
+    for path in paths:
+        if path.endswith(('.parquet', '.pq')):
+            # Requires pyarrow or fastparquet
+            frame = pd.read_parquet(path)
+        elif path.endswith('.json'):
+            frame = _load_candle_store_json(path, timeframe)
+        else:
+            frame = pd.read_csv(path)
+        if frame.empty:
+            continue
+
+        frame.columns = [str(c).lower() for c in frame.columns]
+        missing = {'timestamp', 'high', 'low', 'close'} - set(frame.columns)
+        if missing:
+            raise ValueError(f"{path} is missing columns: {', '.join(sorted(missing))}")
+        if 'symbol' not in frame.columns:
+            frame['symbol'] = _symbol_from_path(path)
+        for field in PRICE_FIELDS:
+            if field not in frame.columns:
+                frame[field] = frame['close'] if field == 'open' else 0.0
+
+        frames.append(frame[['symbol', 'timestamp'] + PRICE_FIELDS])
+        logger.info(f"Loaded {len(frame)} candles from {path}")
+
+    if not frames:
+        raise ValueError('No candles loaded')
+
+    candles = pd.concat(frames, ignore_index=True)
+    # Accept seconds or milliseconds
+    ts = candles['timestamp'].astype('int64')
+    candles['timestamp'] = np.where(ts < 10**11, ts * 1000, ts)
+    return candles
+
+def to_wide(candles: pd.DataFrame, timeframe: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+    """Pivot long candles into one (time x symbol) frame per OHLCV field.
+
+    When timeframe is given the bars are resampled to it (UTC-aligned, the
+    same boundaries websocket_client uses on a UTC host).
+    """
+    candles = candles.drop_duplicates(['symbol', 'timestamp'], keep='last')
+    wide = {}
+    for field in PRICE_FIELDS:
+        frame = candles.pivot(index='timestamp', columns='symbol', values=field).astype(float)
+        frame.index = pd.to_datetime(frame.index, unit='ms', utc=True)
+        wide[field] = frame.sort_index()
+
+    if timeframe:
+        rule = TIMEFRAME_RULES[timeframe]
+        how = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+        wide = {
+            field: frame.resample(rule, label='left', closed='left').agg(how[field])
+            for field, frame in wide.items()
+        }
+        # Empty buckets (no source bars) stay NaN instead of volume 0
+        wide['volume'] = wide['volume'].where(wide['close'].notna())
+    return wide
+
+def rsi_frame(close: pd.DataFrame, period: int) -> pd.DataFrame:
+    """RSI per column, matching ta's RSIIndicator(fillna=True) used live"""
+    diff = close.diff(1)
+    up = diff.where(diff > 0, 0.0)
+    down = -diff.where(diff < 0, 0.0)
+    ema_up = up.ewm(alpha=1 / period, min_periods=0, adjust=False).mean()
+    ema_down = down.ewm(alpha=1 / period, min_periods=0, adjust=False).mean()
+    rsi = pd.DataFrame(
+        np.where(ema_down == 0, 100, 100 - (100 / (1 + ema_up / ema_down))),
+        index=close.index, columns=close.columns
+    )
+    return rsi.replace([np.inf, -np.inf], np.nan).ffill().fillna(50)
+
+def _compute_group(ap: pd.DataFrame, close: pd.DataFrame,
+                   configs: List[IndicatorConfig]) -> Dict[str, Dict[str, pd.DataFrame]]:
+    """WT1/WT2/RSI frames for some symbols that share one row index"""
+    wt_cache: Dict[tuple, pd.DataFrame] = {}
+    rsi_cache: Dict[int, pd.DataFrame] = {}
+
+    results = {}
+    for config in configs:
+        series = indicators.wave_trend_series(ap, config.n1, config.n2, wt_cache)
+        if config.rsi_period not in rsi_cache:
+            rsi_cache[config.rsi_period] = rsi_frame(close, config.rsi_period)
+        results[config.name] = {
+            'wt1': series['wt1'],
+            'wt2': series['wt2'],
+            'rsi': rsi_cache[config.rsi_period],
+        }
+    return results
+
+def compute_series(wide: Dict[str, pd.DataFrame],
+                   configs: List[IndicatorConfig]) -> Dict[str, Dict[str, pd.DataFrame]]:
+    """WT1/WT2/RSI frames for every config, sharing EMAs like the live path.
+
+    NaN rows are bars a symbol does not have (listing later, exchange gaps).
+    The live candle list has no such rows, so EMAs must skip them instead of
+    carrying values through: symbols with holes are computed on their own
+    rows only, and every output is NaN where the symbol has no bar.
+    """
+    close = wide['close']
+    ap = (wide['high'] + wide['low'] + close) / 3
+    valid = ap.notna() & close.notna()
+
+    # Leading NaN rows don't affect the EMAs; anything after the first bar does
+    holed = [symbol for symbol in close.columns
+             if (~valid[symbol] & valid[symbol].cummax()).any()]
+    dense = [symbol for symbol in close.columns if symbol not in holed]
+
+    groups = []
+    if dense:
+        groups.append(_compute_group(ap[dense], close[dense], configs))
+    for symbol in holed:
+        rows = valid[symbol]
+        groups.append(_compute_group(ap.loc[rows, [symbol]], close.loc[rows, [symbol]], configs))
+
+    results = {}
+    for config in configs:
+        results[config.name] = {
+            field: pd.concat([group[config.name][field] for group in groups], axis=1)
+                     .reindex(index=close.index, columns=close.columns)
+                     .where(valid)
+            for field in ('wt1', 'wt2', 'rsi')
+        }
+    return results
+
+def _entered(values: pd.DataFrame, level: float, above: bool) -> pd.DataFrame:
+    """True on the bar where values first reaches level (from the other side)"""
+    previous = values.ffill().shift(1)  # last bar the symbol had, across holes
+    if above:
+        return (values >= level) & (previous < level)
+    return (values <= level) & (previous > level)
+
+def compute_events(series: Dict[str, pd.DataFrame], config: IndicatorConfig) -> Dict[str, pd.DataFrame]:
+    """Boolean (time x symbol) event frames for one config"""
+    wt1, wt2 = series['wt1'], series['wt2']
+    # Compare with the symbol's previous bar, which may lie before a hole
+    prev_wt1, prev_wt2 = wt1.ffill().shift(1), wt2.ffill().shift(1)
+
+    # Same definitions as Indicators._latest_values
+    cross_over = (wt1 > wt2) & (prev_wt1 <= prev_wt2)
+    cross_under = (wt1 < wt2) & (prev_wt1 >= prev_wt2)
+
+    return {
+        'cross_over': cross_over,
+        'cross_under': cross_under,
+        'cross_over_oversold': cross_over & (wt1 <= config.os_level2),
+        'cross_under_overbought': cross_under & (wt1 >= config.ob_level2),
+        'enter_oversold1': _entered(wt1, config.os_level1, above=False),
+        'enter_oversold2': _entered(wt1, config.os_level2, above=False),
+        'enter_overbought1': _entered(wt1, config.ob_level1, above=True),
+        'enter_overbought2': _entered(wt1, config.ob_level2, above=True),
+    }
+
+def forward_returns(close: pd.DataFrame, horizons: List[int]) -> Dict[int, pd.DataFrame]:
+    """Close-to-close return over the next h bars, per horizon"""
+    return {h: close.shift(-h) / close - 1 for h in horizons}
+
+def _hit_stats(events: pd.DataFrame, returns: pd.DataFrame, direction: int) -> Dict[str, float]:
+    mask = events.to_numpy(dtype=bool) & returns.notna().to_numpy()
+    signed = returns.to_numpy()[mask] * direction
+    count = int(mask.sum())
+    hits = int((signed > 0).sum())
+    return {
+        'count': count,
+        'hits': hits,
+        'hit_rate': hits / count if count else float('nan'),
+        'avg_return': float(signed.mean()) if count else float('nan'),
+    }
+
+def summarize(events_by_config: Dict[str, Dict[str, pd.DataFrame]],
+              returns: Dict[int, pd.DataFrame]) -> pd.DataFrame:
+    """Hit rate and mean directional return for every (config, event, horizon)"""
+    rows = []
+    for config_name, events in events_by_config.items():
+        for event, frame in events.items():
+            for horizon, fwd in returns.items():
+                stats = _hit_stats(frame, fwd, EVENT_DIRECTIONS[event])
+                rows.append({'config': config_name, 'event': event, 'horizon': horizon, **stats})
+    return pd.DataFrame(rows)
+
+def scan_levels(wt1: pd.DataFrame, returns: Dict[int, pd.DataFrame],
+                ob_levels: List[float], os_levels: List[float]) -> pd.DataFrame:
+    """Hit rates of entering overbought/oversold for a grid of WT1 levels"""
+    rows = []
+    for side, levels, above, direction in (('overbought', ob_levels, True, -1),
+                                           ('oversold', os_levels, False, 1)):
+        for level in levels:
+            events = _entered(wt1, level, above)
+            for horizon, fwd in returns.items():
+                stats = _hit_stats(events, fwd, direction)
+                rows.append({'side': side, 'level': level, 'horizon': horizon, **stats})
+    return pd.DataFrame(rows)
+
+def run_backtest(wide: Dict[str, pd.DataFrame], configs: List[IndicatorConfig],
+                 horizons: List[int]) -> Dict[str, object]:
+    """Series, events and signal summary for all configs over wide candles"""
+    series = compute_series(wide, configs)
+    events = {config.name: compute_events(series[config.name], config) for config in configs}
+    returns = forward_returns(wide['close'], horizons)
+    return {
+        'series': series,
+        'events': events,
+        'returns': returns,
+        'summary': summarize(events, returns),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Vectorized WaveTrend signal backtest')
+    parser.add_argument('paths', nargs='+', help='candle files (CSV, CSV.gz, Parquet, candle_store JSON)')
+    parser.add_argument('--source-timeframe', default='1m', choices=list(TIMEFRAME_RULES),
+                        help='timeframe of the input bars (default 1m)')
+    parser.add_argument('--timeframe', choices=list(TIMEFRAME_RULES),
+                        help='resample to this timeframe before computing')
+    parser.add_argument('--configs', nargs='*', default=None,
+                        help='registered indicator config names (default: all)')
+    parser.add_argument('--horizons', nargs='+', type=int, default=[1, 4, 16],
+                        help='forward return horizons in bars')
+    parser.add_argument('--scan-ob', nargs='*', type=float, default=[],
+                        help='overbought WT1 levels to scan (uses the first config)')
+    parser.add_argument('--scan-os', nargs='*', type=float, default=[],
+                        help='oversold WT1 levels to scan (uses the first config)')
+    parser.add_argument('--output', help='write the summary as CSV to this path')
+    args = parser.parse_args()
+
+    logging.getLogger('indicators').setLevel(logging.WARNING)
+    names = args.configs or list(indicators.configs)
+    unknown = [name for name in names if name not in indicators.configs]
+    if unknown:
+        parser.error(f"unknown config(s): {', '.join(unknown)}")
+    configs = [indicators.configs[name] for name in names]
+
+    start = time.perf_counter()
+    candles = load_candles(args.paths, args.source_timeframe)
+    timeframe = args.timeframe if args.timeframe != args.source_timeframe else None
+    wide = to_wide(candles, timeframe)
+    loaded = time.perf_counter()
+
+    result = run_backtest(wide, configs, args.horizons)
+    summary = result['summary']
+    computed = time.perf_counter()
+
+    bars, symbols = wide['close'].shape
+    print(f"{symbols} symbols x {bars} bars: load {loaded - start:.2f}s, compute {computed - loaded:.2f}s")
+    print(summary.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    if args.scan_ob or args.scan_os:
+        wt1 = result['series'][configs[0].name]['wt1']
+        scan = scan_levels(wt1, result['returns'], args.scan_ob, args.scan_os)
+        print(f"\nLevel scan ({configs[0].name}):")
+        print(scan.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    if args.output:
+        summary.to_csv(args.output, index=False)
+        print(f"Summary written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""Benchmarks for the trading signals server.
+
+Usage:
+    python bench.py                 # run all benchmarks
+    python bench.py imports startup # import time and cold-start readiness only
+    python bench.py compression     # broadcast bandwidth / CPU at 1000 clients
+    python bench.py --json          # machine readable output
+
+Output can be redirected to bench_output.txt (ignored by git).
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules whose import cost matters for cold start
+IMPORT_MODULES = ['websocket_server', 'websocket_client', 'main', 'indicators']
+NUMERIC_MODULES = ['pandas', 'numpy', 'ta']
+
+_IMPORT_PROBE = """
+import sys, time
+sys.path.insert(0, {repo!r})
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+rss = 0
+with open('/proc/self/status') as f:
+    for line in f:
+        if line.startswith('VmRSS:'):
+            rss = int(line.split()[1]) / 1024
+print(elapsed * 1000, rss)
+"""
+
+
+def _rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def _run_probe(code, cwd):
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=cwd, capture_output=True, text=True, timeout=120
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return result.stdout.strip().splitlines()[-1]
+
+
+def bench_imports(repeat=3):
+    """Import time (ms, best of N fresh interpreters) and RSS after import"""
+    results = {}
+    with tempfile.TemporaryDirectory() as cwd:
+        for module in IMPORT_MODULES:
+            best_ms, rss = None, None
+            for _ in range(repeat):
+                try:
+                    out = _run_probe(_IMPORT_PROBE.format(repo=REPO_DIR, module=module), cwd)
+                except Exception as e:
+                    results[module] = {'error': str(e)}
+                    break
+                ms, mb = (float(x) for x in out.split())
+                if best_ms is None or ms < best_ms:
+                    best_ms, rss = ms, mb
+            else:
+                results[module] = {'import_ms': round(best_ms, 1), 'rss_mb': round(rss, 1)}
+    return results
+
+
+def _startup_child(port):
+    """Child process: start the server the way main.py does and report readiness"""
+    sys.path.insert(0, REPO_DIR)
+    import main
+    import websocket_server
+
+    async def run():
+        server_task = asyncio.create_task(websocket_server.start_server(port=port, host='127.0.0.1'))
+        await websocket_server.get_server_ready().wait()
+        print(json.dumps({
+            'event': 'ready',
+            'ready_ms': (time.monotonic() - main._PROCESS_START) * 1000,
+            'rss_mb': _rss_mb(),
+            'numeric_loaded': [m for m in NUMERIC_MODULES if m in sys.modules],
+        }), flush=True)
+
+        start = time.monotonic()
+        await asyncio.to_thread(main.load_heavy_modules)
+        print(json.dumps({
+            'event': 'loaded',
+            'load_ms': (time.monotonic() - start) * 1000,
+            'rss_mb': _rss_mb(),
+        }), flush=True)
+        await server_task
+
+    asyncio.run(run())
+
+
+async def _first_message_ms(port, spawn_time, timeout=30):
+    import websockets
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with websockets.connect(f"ws://127.0.0.1:{port}") as ws:
+                await ws.recv()
+                return (time.monotonic() - spawn_time) * 1000
+        except OSError:
+            await asyncio.sleep(0.005)
+    raise TimeoutError('server never accepted a connection')
+
+
+def bench_startup(port=18765):
+    """Cold start: time until the server accepts clients and RSS at that point"""
+    with tempfile.TemporaryDirectory() as cwd:
+        spawn_time = time.monotonic()
+        proc = subprocess.Popen(
+            [sys.executable, os.path.join(REPO_DIR, 'bench.py'), '--startup-child', str(port)],
+            cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+        )
+        try:
+            first_message_ms = asyncio.run(_first_message_ms(port, spawn_time))
+            events = {}
+            while len(events) < 2:
+                line = proc.stdout.readline()
+                if not line:
+                    break
+                if line.startswith('{'):
+                    event = json.loads(line)
+                    events[event.pop('event')] = event
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    ready = events.get('ready', {})
+    loaded = events.get('loaded', {})
+    return {
+        'spawn_to_first_message_ms': round(first_message_ms, 1),
+        'ready_ms': round(ready.get('ready_ms', 0), 1),
+        'rss_at_ready_mb': round(ready.get('rss_mb', 0), 1),
+        'numeric_loaded_at_ready': ready.get('numeric_loaded', []),
+        'numeric_load_ms': round(loaded.get('load_ms', 0), 1),
+        'rss_after_numeric_mb': round(loaded.get('rss_mb', 0), 1),
+    }
+
+
+def _synthetic_wide(symbols, bars, seed=0):
+    """Random-walk OHLCV frames shaped like backtest.to_wide() output"""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2023-01-01', periods=bars, freq='15min', tz='UTC')
+    columns = [f"SYM{i}_USDT" for i in range(symbols)]
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, (bars, symbols)), axis=0))
+    spread = np.abs(rng.normal(0, 0.002, (bars, symbols))) * close
+    frame = lambda values: pd.DataFrame(values, index=index, columns=columns)
+    return {
+        'open': frame(np.roll(close, 1, axis=0)),
+        'high': frame(close + spread),
+        'low': frame(close - spread),
+        'close': frame(close),
+        'volume': frame(np.ones((bars, symbols))),
+    }
+
+
+def bench_backtest(symbols=50, bars=2 * 365 * 96):
+    """Vectorized backtest: 2 years of 15m bars for 50 symbols, plus a level scan"""
+    sys.path.insert(0, REPO_DIR)
+    import logging
+    logging.getLogger('indicators').setLevel(logging.WARNING)
+    import backtest
+    from indicators import indicators, IndicatorConfig
+
+    wide = _synthetic_wide(symbols, bars)
+    configs = [indicators.configs['default'], IndicatorConfig('bench_fast', n1=10, n2=12, rsi_period=7)]
+
+    start = time.perf_counter()
+    result = backtest.run_backtest(wide, configs, [4, 16])
+    computed = time.perf_counter()
+    levels = list(range(40, 80, 5))
+    backtest.scan_levels(result['series']['default']['wt1'], result['returns'],
+                         levels, [-level for level in levels])
+    scanned = time.perf_counter()
+
+    return {
+        'symbols': symbols,
+        'bars': bars,
+        'configs': len(configs),
+        'series_events_summary_s': round(computed - start, 2),
+        'level_scan_s': round(scanned - computed, 2),
+        'level_scan_points': len(levels) * 2 * 2,
+    }
+
+
+def _feed_messages(seconds, tick, symbols=50, timeframes=('1m', '5m', '15m', '1h', '4h'), seed=0):
+    """Indicator updates per tick: every stream updates about once a second"""
+    import random
+    from datetime import datetime, timedelta
+
+    rng = random.Random(seed)
+    streams = [(f"SYM{i}_USDT", timeframe) for i in range(symbols) for timeframe in timeframes]
+    state = {stream: [rng.uniform(-60, 60), rng.uniform(-60, 60), rng.uniform(30, 70), rng.uniform(1, 1000)]
+             for stream in streams}
+    phase = {stream: rng.randrange(int(1 / tick)) for stream in streams}
+    start = datetime(2024, 1, 1)
+
+    ticks = []
+    for t in range(int(seconds / tick)):
+        updates = []
+        for stream in streams:
+            if t % int(1 / tick) != phase[stream]:
+                continue
+            wt1, wt2, rsi, price = state[stream]
+            state[stream] = [wt1 + rng.gauss(0, 2), wt2 + rng.gauss(0, 1.5),
+                             min(max(rsi + rng.gauss(0, 1), 0), 100), price * (1 + rng.gauss(0, 0.001))]
+            wt1, wt2, rsi, price = state[stream]
+            updates.append(((*stream, 'default'), json.dumps({
+                'type': 'indicators', 'symbol': stream[0], 'timeframe': stream[1], 'config': 'default',
+                'wt1': round(wt1, 2), 'wt2': round(wt2, 2), 'rsi': round(rsi, 2), 'price': round(price, 4),
+                'timestamp': (start + timedelta(seconds=t * tick)).isoformat()
+            })))
+        ticks.append(updates)
+    return ticks
+
+
+def bench_compression(clients=1000, seconds=2, tick=0.1):
+    """Outbound bytes and CPU of broadcasting the indicator feed to N clients.
+
+    Runs the server's frame path (extension encode + frame serialization, as
+    in websockets.broadcast) for every client; sockets are left out so the
+    numbers isolate what each compression mode costs. All clients subscribe
+    to every stream; batched modes send one frame per tick.
+    """
+    sys.path.insert(0, REPO_DIR)
+    from websockets import frames
+    from websockets.extensions.permessage_deflate import PerMessageDeflate
+    import websocket_server
+    import ws_compression
+
+    ticks = _feed_messages(seconds, tick)
+    settings = (ws_compression.CLIENT_MAX_WINDOW_BITS, ws_compression.SERVER_MAX_WINDOW_BITS,
+                ws_compression.COMPRESS_SETTINGS)
+    extensions = {
+        'none': lambda: [],
+        'deflate': lambda: [PerMessageDeflate(False, False, *settings)],
+        'shared': lambda: [ws_compression.SharedPerMessageDeflate(False, True, *settings)],
+    }
+    modes = [('none', False), ('deflate', False), ('shared', False),
+             ('none', True), ('deflate', True), ('shared', True)]
+
+    results = {}
+    baseline = None
+    for mode, batched in modes:
+        connections = [extensions[mode]() for _ in range(clients)]
+        ws_compression._frame_cache.clear()
+        if batched:
+            payloads = [websocket_server.build_batch(dict(updates).values()) for updates in ticks if updates]
+        else:
+            payloads = [message for updates in ticks for _, message in updates]
+
+        sent = 0
+        start = time.process_time()
+        for payload in payloads:
+            data = payload.encode()  # once per broadcast, as websockets.broadcast does
+            for connection in connections:
+                frame = frames.Frame(frames.OP_TEXT, data)
+                sent += len(frame.serialize(mask=False, extensions=connection))
+        cpu = time.process_time() - start
+
+        baseline = baseline or sent
+        results[f"{mode}{'+batch' if batched else ''}"] = {
+            'frames_per_client': len(payloads),
+            'mb_per_s': round(sent / seconds / 1e6, 2),
+            'bytes_vs_none_pct': round(100 * sent / baseline, 1),
+            'cpu_ms_per_s': round(cpu * 1000 / seconds, 1),
+        }
+    return results
+
+
+BENCHMARKS = {
+    'imports': bench_imports,
+    'startup': bench_startup,
+    'backtest': bench_backtest,
+    'compression': bench_compression,
+}
+
+
+def _print_results(name, results):
+    print(f"== {name}")
+    for key, value in results.items():
+        if isinstance(value, dict):
+            fields = '  '.join(f"{k}={v}" for k, v in value.items())
+            print(f"  {key:<28} {fields}")
+        else:
+            print(f"  {key:<28} {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Trading signals server benchmarks')
+    parser.add_argument('benchmarks', nargs='*', help=f"subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    parser.add_argument('--startup-child', type=int, metavar='PORT', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.startup_child:
+        _startup_child(args.startup_child)
+        return
+
+    selected = args.benchmarks or list(BENCHMARKS)
+    unknown = [name for name in selected if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    all_results = {}
+    for name in selected:
+        all_results[name] = BENCHMARKS[name]()
+        if not args.json:
+            _print_results(name, all_results[name])
+
+    if args.json:
+        print(json.dumps(all_results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+"""Local stub of the MEXC contract WebSocket that replays recorded frames.
+
+Point the bot at it with MEXC_WS_URL=ws://localhost:8765 to exercise the feed
+(kline or ticker mode) without touching the exchange.
+
+Record real frames:
+    python feed_replay.py record frames.jsonl --symbols BTC_USDT ETH_USDT --duration 120
+Replay them (speed 0 = as fast as possible):
+    python feed_replay.py serve frames.jsonl --port 8765 --speed 10
+Generate synthetic kline frames instead of recording:
+    python feed_replay.py synthetic frames.jsonl --symbols BTC_USDT --bars 50
+
+Frames files are JSON lines: {"t": seconds since start, "frame": <raw frame>}.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+
+import websockets
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+MEXC_WS_URL = 'wss://contract.mexc.com/edge'
+INTERVAL_SECONDS = {'Min1': 60, 'Min5': 300, 'Min15': 900, 'Min60': 3600, 'Hour4': 14400}
+
+def load_frames(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def save_frames(path, frames):
+    with open(path, 'w') as f:
+        for entry in frames:
+            f.write(json.dumps(entry) + '\n')
+
+async def record(path, symbols, intervals, duration, tickers=False, url=MEXC_WS_URL):
+    """Record raw frames from the exchange for `duration` seconds"""
+    frames = []
+    async with websockets.connect(url) as ws:
+        for symbol in symbols:
+            for interval in intervals:
+                await ws.send(json.dumps({"method": "sub.kline", "param": {"symbol": symbol, "interval": interval}}))
+            if tickers:
+                await ws.send(json.dumps({"method": "sub.ticker", "param": {"symbol": symbol}}))
+
+        start = time.monotonic()
+        while time.monotonic() - start < duration:
+            try:
+                message = await asyncio.wait_for(ws.recv(), timeout=max(duration - (time.monotonic() - start), 0.1))
+            except asyncio.TimeoutError:
+                break
+            frames.append({'t': round(time.monotonic() - start, 3), 'frame': json.loads(message)})
+
+    save_frames(path, frames)
+    logger.info(f"Recorded {len(frames)} frames to {path}")
+
+def synthetic_frames(symbols, intervals, bars, pushes_per_bar=5, seed=0):
+    """Kline push frames for a random walk, several pushes per bar"""
+    rng = random.Random(seed)
+    frames = []
+    now = int(time.time())
+    for symbol in symbols:
+        price = 100.0
+        for interval in intervals:
+            step = INTERVAL_SECONDS[interval]
+            first_bar = (now // step - bars + 1) * step
+            for i in range(bars):
+                open_price = high = low = close = price
+                volume = 0.0
+                for push in range(pushes_per_bar):
+                    close = close * (1 + rng.gauss(0, 0.002))
+                    high, low = max(high, close), min(low, close)
+                    volume += rng.randint(1, 100)
+                    frames.append({'t': i + push / pushes_per_bar, 'frame': {
+                        'channel': 'push.kline',
+                        'symbol': symbol,
+                        'data': {
+                            'symbol': symbol, 'interval': interval, 't': first_bar + i * step,
+                            'o': open_price, 'h': high, 'l': low, 'c': close,
+                            'q': volume, 'a': volume * close
+                        }
+                    }})
+                price = close
+    frames.sort(key=lambda entry: entry['t'])
+    return frames
+
+async def serve(frames, port, speed=0.0, loop_frames=False, host='127.0.0.1', on_ready=None):
+    """Serve the frames to every client once it has sent its first subscription.
+
+    Port 0 binds an ephemeral port; on_ready, if given, is called with the
+    bound port once the server is listening.
+    """
+
+    async def handler(ws):
+        subscribed = asyncio.Event()
+
+        async def reader():
+            async for message in ws:
+                request = json.loads(message)
+                method = request.get('method', '')
+                if method == 'ping':
+                    await ws.send(json.dumps({'channel': 'pong', 'data': int(time.time() * 1000)}))
+                elif method.startswith('sub.'):
+                    await ws.send(json.dumps({'channel': f"rs.{method}", 'data': 'success'}))
+                    subscribed.set()
+
+        reader_task = asyncio.create_task(reader())
+        try:
+            await subscribed.wait()
+            while True:
+                previous = 0.0
+                for entry in frames:
+                    if speed > 0 and entry['t'] > previous:
+                        await asyncio.sleep((entry['t'] - previous) / speed)
+                    previous = entry['t']
+                    await ws.send(json.dumps(entry['frame']))
+                logger.info(f"Replayed {len(frames)} frames")
+                if not loop_frames:
+                    break
+            await reader_task
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            reader_task.cancel()
+
+    async with websockets.serve(handler, host, port) as server:
+        port = server.sockets[0].getsockname()[1]
+        logger.info(f"Replaying {len(frames)} frames on ws://{host}:{port}")
+        if on_ready:
+            on_ready(port)
+        await asyncio.Future()
+
+def main():
+    parser = argparse.ArgumentParser(description='MEXC feed recorder / replay stub')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    rec = sub.add_parser('record', help='record frames from the exchange')
+    rec.add_argument('path')
+    rec.add_argument('--symbols', nargs='+', default=['BTC_USDT'])
+    rec.add_argument('--intervals', nargs='+', default=list(INTERVAL_SECONDS))
+    rec.add_argument('--duration', type=float, default=60)
+    rec.add_argument('--tickers', action='store_true', help='also record sub.ticker frames')
+
+    syn = sub.add_parser('synthetic', help='write synthetic kline frames')
+    syn.add_argument('path')
+    syn.add_argument('--symbols', nargs='+', default=['BTC_USDT'])
+    syn.add_argument('--intervals', nargs='+', default=list(INTERVAL_SECONDS))
+    syn.add_argument('--bars', type=int, default=50)
+    syn.add_argument('--pushes-per-bar', type=int, default=5)
+
+    srv = sub.add_parser('serve', help='replay a frames file to connecting clients')
+    srv.add_argument('path')
+    srv.add_argument('--port', type=int, default=8765)
+    srv.add_argument('--speed', type=float, default=0.0, help='time scale (0 = no delays)')
+    srv.add_argument('--loop', action='store_true', help='replay the file forever')
+
+    args = parser.parse_args()
+    if args.command == 'record':
+        asyncio.run(record(args.path, args.symbols, args.intervals, args.duration, args.tickers))
+    elif args.command == 'synthetic':
+        frames = synthetic_frames(args.symbols, args.intervals, args.bars, args.pushes_per_bar)
+        save_frames(args.path, frames)
+        logger.info(f"Wrote {len(frames)} synthetic frames to {args.path}")
+    else:
+        try:
+            asyncio.run(serve(load_frames(args.path), args.port, args.speed, args.loop))
+        except KeyboardInterrupt:
+            logger.info("Replay stopped by user")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""Read-only HTTP query API served on the same port as the WebSocket server.
+
+GET /api/candles?symbol=BTC_USDT&timeframe=15m[&limit=200][&config=default]
+    Last N candles (oldest first) with WT1/WT2/RSI per bar.
+GET /api/screen?timeframe=15m[&config=default][&max_wt1=-60][&min_wt1=..]
+               [&min_rsi=..][&max_rsi=..][&sort=wt1][&order=asc][&limit=N]
+    Latest indicator values of every symbol on one timeframe, filtered and sorted.
+GET /api/stats
+    Indicator cache counters, connection counts and compression counters.
+
+Candle/screen responses carry an ETag derived from the stream versions, so
+polling clients that send If-None-Match get a 304 until something changes.
+"""
+import asyncio
+import hashlib
+import http
+import json
+import logging
+from itertools import islice
+from urllib.parse import urlsplit, parse_qs
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = '/api'
+DEFAULT_LIMIT = 200
+MAX_LIMIT = 500  # websocket_client keeps at most 500 candles per stream
+SCREEN_SORT_FIELDS = ['wt1', 'wt2', 'rsi', 'price', 'symbol']
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+def _response(status, body, etag=None, extra_headers=()):
+    headers = [
+        ('Content-Type', 'application/json'),
+        ('Cache-Control', 'no-cache'),
+        ('Access-Control-Allow-Origin', '*'),
+    ]
+    if etag:
+        headers.append(('ETag', etag))
+    headers.extend(extra_headers)
+    return status, headers, json.dumps(body).encode()
+
+def _make_etag(*parts):
+    digest = hashlib.sha1('|'.join(str(p) for p in parts).encode()).hexdigest()
+    return f'"{digest[:20]}"'
+
+def _etag_matches(request_headers, etag):
+    header = request_headers.get('If-None-Match')
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(',')]
+    return '*' in tags or etag in tags or f"W/{etag}" in tags
+
+def _param(params, name, default=None):
+    values = params.get(name)
+    return values[-1] if values else default
+
+def _float_param(params, name):
+    value = _param(params, name)
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise ApiError(http.HTTPStatus.BAD_REQUEST, f"{name} must be a number")
+
+def _int_param(params, name, default, maximum):
+    value = _param(params, name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ApiError(http.HTTPStatus.BAD_REQUEST, f"{name} must be an integer")
+    if value < 1:
+        raise ApiError(http.HTTPStatus.BAD_REQUEST, f"{name} must be positive")
+    return min(value, maximum)
+
+def _config_param(params):
+    import indicators
+
+    config = _param(params, 'config', indicators.DEFAULT_CONFIG)
+    if config not in indicators.indicators.configs:
+        raise ApiError(http.HTTPStatus.NOT_FOUND, f"Unknown config: {config}")
+    return config
+
+def _timeframe_param(params):
+    import websocket_client
+
+    timeframe = _param(params, 'timeframe')
+    if timeframe not in websocket_client.TIMEFRAMES:
+        raise ApiError(http.HTTPStatus.BAD_REQUEST,
+                       f"timeframe must be one of {', '.join(websocket_client.TIMEFRAMES)}")
+    return timeframe
+
+def _candles_body(symbol, timeframe, config, limit):
+    import websocket_client
+
+    try:
+        version, series = websocket_client.get_indicator_series(symbol, timeframe, config)
+    except ValueError:
+        # Not enough history yet; still return the candles
+        version, series = None, {'timestamp': [], 'wt1': [], 'wt2': [], 'rsi': []}
+
+    # Index only the tail of the series we may need
+    start = max(len(series['timestamp']) - limit, 0)
+    positions = {ts: i for i, ts in enumerate(series['timestamp'][start:], start)}
+
+    # candle_store is newest first; read only the newest `limit` entries
+    newest = list(islice(websocket_client.candle_store[symbol][timeframe], limit))
+    rows = []
+    for candle in reversed(newest):
+        i = positions.get(candle['timestamp'])
+        rows.append({
+            'timestamp': candle['timestamp'],
+            'open': candle['open'],
+            'high': candle['high'],
+            'low': candle['low'],
+            'close': candle['close'],
+            'volume': candle['volume'],
+            'wt1': series['wt1'][i] if i is not None else None,
+            'wt2': series['wt2'][i] if i is not None else None,
+            'rsi': series['rsi'][i] if i is not None else None,
+        })
+
+    return {
+        'symbol': symbol,
+        'timeframe': timeframe,
+        'config': config,
+        'version': version,
+        'candles': rows
+    }
+
+async def get_candles(params, request_headers):
+    import websocket_client
+
+    symbol = _param(params, 'symbol')
+    if symbol not in websocket_client.candle_store:
+        raise ApiError(http.HTTPStatus.NOT_FOUND, f"Unknown symbol: {symbol}")
+    timeframe = _timeframe_param(params)
+    config = _config_param(params)
+    limit = _int_param(params, 'limit', DEFAULT_LIMIT, MAX_LIMIT)
+
+    etag = _make_etag('candles', symbol, timeframe, config, limit,
+                      websocket_client.stream_versions[symbol][timeframe])
+    if _etag_matches(request_headers, etag):
+        return http.HTTPStatus.NOT_MODIFIED, [('ETag', etag)], b''
+
+    body = await asyncio.to_thread(_candles_body, symbol, timeframe, config, limit)
+    return _response(http.HTTPStatus.OK, body, etag)
+
+def _screen_body(timeframe, config, filters, sort, descending, limit):
+    import websocket_client
+
+    rows = []
+    for symbol in websocket_client.SYMBOLS:
+        values = websocket_client.get_indicator_results(symbol, timeframe, [config]).get(config)
+        if values is None:
+            continue
+        candles = websocket_client.candle_store[symbol][timeframe]
+        row = {
+            'symbol': symbol,
+            'wt1': round(values['wt1'], 2),
+            'wt2': round(values['wt2'], 2),
+            'rsi': round(values['rsi'], 2) if values['rsi'] is not None else None,
+            'price': websocket_client.last_prices.get(symbol, candles[0]['close'] if candles else None),
+            'cross_over': values['cross_over'],
+            'cross_under': values['cross_under'],
+        }
+        if all(check(row) for check in filters):
+            rows.append(row)
+
+    # Missing values (e.g. RSI still warming up) always sort last
+    present = [row for row in rows if row[sort] is not None]
+    missing = [row for row in rows if row[sort] is None]
+    present.sort(key=lambda row: row[sort], reverse=descending)
+    rows = present + missing
+    if limit:
+        rows = rows[:limit]
+
+    return {'timeframe': timeframe, 'config': config, 'count': len(rows), 'results': rows}
+
+async def get_screen(params, request_headers):
+    import websocket_client
+
+    timeframe = _timeframe_param(params)
+    config = _config_param(params)
+    sort = _param(params, 'sort', 'wt1')
+    if sort not in SCREEN_SORT_FIELDS:
+        raise ApiError(http.HTTPStatus.BAD_REQUEST, f"sort must be one of {', '.join(SCREEN_SORT_FIELDS)}")
+    order = _param(params, 'order', 'asc')
+    if order not in ('asc', 'desc'):
+        raise ApiError(http.HTTPStatus.BAD_REQUEST, "order must be asc or desc")
+    limit = _int_param(params, 'limit', 0, len(websocket_client.SYMBOLS))
+
+    filters = []
+    for field in ('wt1', 'rsi'):
+        low = _float_param(params, f"min_{field}")
+        high = _float_param(params, f"max_{field}")
+        if low is not None:
+            filters.append(lambda row, f=field, v=low: row[f] is not None and row[f] >= v)
+        if high is not None:
+            filters.append(lambda row, f=field, v=high: row[f] is not None and row[f] <= v)
+
+    versions = [websocket_client.stream_versions[symbol][timeframe] for symbol in websocket_client.SYMBOLS]
+    # Rows show the latest traded price, which can move without a candle
+    # change (TICKER_PRICES=1)
+    prices = [websocket_client.last_prices.get(symbol) for symbol in websocket_client.SYMBOLS]
+    etag = _make_etag('screen', timeframe, config, sorted(params.items()), versions, prices)
+    if _etag_matches(request_headers, etag):
+        return http.HTTPStatus.NOT_MODIFIED, [('ETag', etag)], b''
+
+    body = await asyncio.to_thread(_screen_body, timeframe, config, filters, sort, order == 'desc', limit)
+    return _response(http.HTTPStatus.OK, body, etag)
+
+async def get_stats(params, request_headers):
+    import websocket_client
+    import websocket_server
+    import ws_compression
+
+    return _response(http.HTTPStatus.OK, {
+        'streams': sum(len(timeframes) for timeframes in websocket_client.candle_store.values()),
+        'clients': len(websocket_server.connected_clients),
+        'batch_clients': len(websocket_server.batch_clients),
+        'compression': {'mode': ws_compression.WS_COMPRESSION, **ws_compression.stats()},
+        'indicator_cache': websocket_client.indicator_cache.stats()
+    })
+
+ROUTES = {
+    '/api/candles': get_candles,
+    '/api/screen': get_screen,
+    '/api/stats': get_stats,
+}
+
+async def process_request(path, request_headers):
+    """websockets process_request hook: answer /api/* as plain HTTP.
+
+    Returns None for every other path so the WebSocket handshake proceeds.
+    """
+    url = urlsplit(path)
+    if url.path != API_PREFIX and not url.path.startswith(API_PREFIX + '/'):
+        return None
+
+    handler = ROUTES.get(url.path.rstrip('/'))
+    if handler is None:
+        return _response(http.HTTPStatus.NOT_FOUND, {'error': f"Unknown endpoint: {url.path}"})
+
+    # The numeric stack is loaded right after the server binds (main.py).
+    # Importing it here mid-load would block the event loop until it is done.
+    import websocket_server
+    if not websocket_server.numeric_ready.is_set():
+        return _response(http.HTTPStatus.SERVICE_UNAVAILABLE, {'error': 'Server is starting up'},
+                         extra_headers=[('Retry-After', '1')])
+
+    try:
+        return await handler(parse_qs(url.query), request_headers)
+    except ApiError as e:
+        return _response(e.status, {'error': e.message})
+    except Exception as e:
+        logger.error(f"Error handling {path}: {e}")
+        return _response(http.HTTPStatus.INTERNAL_SERVER_ERROR, {'error': 'Internal server error'})
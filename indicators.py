@@ -3,8 +3,9 @@ import pandas as pd
 from ta.trend import EMAIndicator
 from ta.momentum import RSIIndicator
 import logging
-from typing import List, Dict, Any
-from datetime import datetime
+import json
+import os
+from typing import List, Dict, Any, Optional
 import traceback
 
 # Configure logging
@@ -14,6 +15,39 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
+DEFAULT_CONFIG = 'default'
+
+class IndicatorConfig:
+    """A named WaveTrend/RSI parameter set clients can subscribe to"""
+
+    def __init__(self, name: str, n1: int = 10, n2: int = 21,
+                 ob_level1: float = 60, ob_level2: float = 53,
+                 os_level1: float = -60, os_level2: float = -53,
+                 rsi_period: int = 14):
+        self.name = name
+        self.n1 = int(n1)  # Channel Length
+        self.n2 = int(n2)  # Average Length
+        self.ob_level1 = ob_level1  # Overbought Level 1
+        self.ob_level2 = ob_level2  # Overbought Level 2
+        self.os_level1 = os_level1  # Oversold Level 1
+        self.os_level2 = os_level2  # Oversold Level 2
+        self.rsi_period = int(rsi_period)
+
+    @property
+    def key(self) -> tuple:
+        """Hashable identity of the parameter set (used for result caching)"""
+        return (self.name, self.n1, self.n2, self.ob_level1, self.ob_level2,
+                self.os_level1, self.os_level2, self.rsi_period)
+
+    @property
+    def min_candles(self) -> int:
+        return max(self.n1, self.n2, 4)
+
+    def __repr__(self):
+        return (f"IndicatorConfig({self.name!r}, n1={self.n1}, n2={self.n2}, "
+                f"ob=({self.ob_level1}, {self.ob_level2}), os=({self.os_level1}, {self.os_level2}), "
+                f"rsi_period={self.rsi_period})")
+
 class Indicators:
     def __init__(self):
         self.n1 = 10  # Channel Length
@@ -23,6 +57,40 @@ class Indicators:
         self.os_level1 = -60  # Oversold Level 1
         self.os_level2 = -53  # Oversold Level 2
 
+        # Registered parameter sets, computed together by calculate_configs()
+        self.configs: Dict[str, IndicatorConfig] = {}
+        self.register_config(IndicatorConfig(
+            DEFAULT_CONFIG, self.n1, self.n2,
+            self.ob_level1, self.ob_level2, self.os_level1, self.os_level2
+        ))
+
+    def register_config(self, config: IndicatorConfig) -> IndicatorConfig:
+        """Register (or replace) a named indicator configuration"""
+        if config.n1 < 1 or config.n2 < 1 or config.rsi_period < 1:
+            raise ValueError(f"Invalid indicator periods in {config!r}")
+        self.configs[config.name] = config
+        logger.info(f"Registered indicator config {config!r}")
+        return config
+
+    def load_configs_from_env(self, var: str = 'INDICATOR_CONFIGS') -> None:
+        """Register configs from a JSON list in the environment, e.g.
+        INDICATOR_CONFIGS='[{"name": "fast", "n1": 9, "n2": 12, "rsi_period": 7}]'
+        """
+        raw = os.environ.get(var)
+        if not raw:
+            return
+        try:
+            entries = json.loads(raw)
+        except ValueError as e:
+            logger.error(f"Invalid {var}: {e}")
+            return
+        # A bad entry only skips itself
+        for entry in entries:
+            try:
+                self.register_config(IndicatorConfig(**entry))
+            except Exception as e:
+                logger.error(f"Invalid {var} entry {entry!r}: {e}")
+
     def calculate_rsi(self, candles, period=14):
         """Calculate RSI using ta library's RSIIndicator."""
         try:
@@ -57,76 +125,149 @@ class Indicators:
             logger.error(traceback.format_exc())
             return pd.Series()
 
-    def calculate_wave_trend(self, candles: List[Dict[str, Any]]) -> Dict[str, Any]:
-        if len(candles) < max(self.n1, self.n2, 4):
-            raise ValueError(f"Not enough candles to calculate Wave Trend. Need at least {max(self.n1, self.n2, 4)} candles, but got {len(candles)}")
-
-        # Sort candles by timestamp in descending order (newest first)
-        sorted_candles = sorted(candles, key=lambda x: x['timestamp'], reverse=True)
-        
-        # Convert sorted candles to pandas DataFrame and reverse order (oldest first)
-        df = pd.DataFrame(sorted_candles[::-1])
-        
+    def _candle_frame(self, candles: List[Dict[str, Any]]) -> pd.DataFrame:
+        """Candles as a DataFrame in ascending time order with AP (HLC3)"""
+        # Sort candles by timestamp in ascending order (oldest first)
+        df = pd.DataFrame(sorted(candles, key=lambda x: x['timestamp']))
+
         # Calculate AP (HLC3)
         df['ap'] = (df['high'] + df['low'] + df['close']) / 3
-        
-        # Calculate ESA = EMA(AP, n1)
-        df['esa'] = df['ap'].ewm(span=self.n1, min_periods=self.n1, adjust=False).mean()
-        
-        # Calculate D = EMA(abs(AP - ESA), n1)
-        df['d'] = abs(df['ap'] - df['esa'])
-        df['d'] = df['d'].ewm(span=self.n1, min_periods=self.n1, adjust=False).mean()
-        
-        # Avoid division by zero
-        df['d'] = df['d'].replace(0, 0.00001)
-        
-        # Calculate CI = (AP - ESA) / (0.015 * D)
-        df['ci'] = (df['ap'] - df['esa']) / (0.015 * df['d'])
-        
-        # Calculate WT1 = EMA(CI, n2)
-        df['wt1'] = df['ci'].ewm(span=self.n2, min_periods=self.n2, adjust=False).mean()
-        
-        # Calculate WT2 = SMA(WT1, 4)
-        df['wt2'] = df['wt1'].rolling(window=4, min_periods=4).mean()
-        
-        # Reverse back to newest first
-        df = df.iloc[::-1]
-
-        # Debug logging
-        #print('\nLast 10 candles values:')
-        for i in range(min(10, len(df))):
-            timestamp = datetime.fromtimestamp(df.iloc[i]['timestamp'] / 1000).strftime('%H:%M:%S')
-            wt2_value = df.iloc[i]['wt2']
-            wt2_str = f"{wt2_value:.6f}" if not pd.isna(wt2_value) else "N/A"
-            
-            # print(f"Time: {timestamp} "
-            #       f"H: {df.iloc[i]['high']:.6f} "
-            #       f"L: {df.iloc[i]['low']:.6f} "
-            #       f"C: {df.iloc[i]['close']:.6f} "
-            #       f"AP: {df.iloc[i]['ap']:.6f} "
-            #       f"EMA: {df.iloc[i]['esa']:.6f} "
-            #       f"D: {df.iloc[i]['d']:.6f} "
-            #       f"WT1: {df.iloc[i]['wt1']:.6f} "
-            #       f"WT2: {wt2_str}")
-
-        # Get current values
-        current = df.iloc[0]
-        previous = df.iloc[1] if len(df) > 1 else None
+        return df
+
+    def wave_trend_series(self, ap, n1: int, n2: int, cache: Dict[tuple, Any]) -> Dict[str, Any]:
+        """WT series for one (n1, n2), reusing intermediates already in cache.
+
+        ESA, D and CI only depend on n1 and WT1 only on (n1, n2), so configs
+        sharing a channel length share all of that work. `ap` may be a Series
+        (one stream) or a DataFrame with one column per symbol (backtest.py).
+        """
+        if ('ci', n1) not in cache:
+            # Calculate ESA = EMA(AP, n1)
+            esa = ap.ewm(span=n1, min_periods=n1, adjust=False).mean()
+
+            # Calculate D = EMA(abs(AP - ESA), n1)
+            d = abs(ap - esa).ewm(span=n1, min_periods=n1, adjust=False).mean()
+
+            # Avoid division by zero
+            d = d.replace(0, 0.00001)
+
+            # Calculate CI = (AP - ESA) / (0.015 * D)
+            cache[('esa', n1)] = esa
+            cache[('d', n1)] = d
+            cache[('ci', n1)] = (ap - esa) / (0.015 * d)
+
+        if ('wt1', n1, n2) not in cache:
+            # Calculate WT1 = EMA(CI, n2)
+            wt1 = cache[('ci', n1)].ewm(span=n2, min_periods=n2, adjust=False).mean()
+
+            # Calculate WT2 = SMA(WT1, 4)
+            cache[('wt1', n1, n2)] = wt1
+            cache[('wt2', n1, n2)] = wt1.rolling(window=4, min_periods=4).mean()
+
+        return {
+            'esa': cache[('esa', n1)],
+            'd': cache[('d', n1)],
+            'ci': cache[('ci', n1)],
+            'wt1': cache[('wt1', n1, n2)],
+            'wt2': cache[('wt2', n1, n2)],
+        }
+
+    def _latest_values(self, df: pd.DataFrame, series: Dict[str, pd.Series],
+                       config: IndicatorConfig) -> Dict[str, Any]:
+        """Latest-bar values and signal flags for one config"""
+        wt1 = float(series['wt1'].iloc[-1])
+        wt2 = series['wt2'].iloc[-1]
+        wt2 = float(wt2) if not pd.isna(wt2) else 0.0
+
+        cross_over = cross_under = False
+        if len(df) > 1:
+            prev_wt1 = float(series['wt1'].iloc[-2])
+            prev_wt2 = float(series['wt2'].iloc[-2])
+            cross_over = wt1 > wt2 and prev_wt1 <= prev_wt2
+            cross_under = wt1 < wt2 and prev_wt1 >= prev_wt2
+
+        return {
+            'ap': float(df['ap'].iloc[-1]),
+            'esa': float(series['esa'].iloc[-1]),
+            'd': float(series['d'].iloc[-1]),
+            'ci': float(series['ci'].iloc[-1]),
+            'wt1': wt1,
+            'wt2': wt2,
+            'overbought1': wt1 >= config.ob_level1,
+            'overbought2': wt1 >= config.ob_level2,
+            'oversold1': wt1 <= config.os_level1,
+            'oversold2': wt1 <= config.os_level2,
+            'cross_over': cross_over,
+            'cross_under': cross_under
+        }
+
+    def calculate_wave_trend(self, candles: List[Dict[str, Any]]) -> Dict[str, Any]:
+        config = self.configs[DEFAULT_CONFIG]
+        if len(candles) < config.min_candles:
+            raise ValueError(f"Not enough candles to calculate Wave Trend. Need at least {config.min_candles} candles, but got {len(candles)}")
+
+        df = self._candle_frame(candles)
+        series = self.wave_trend_series(df['ap'], config.n1, config.n2, {})
+        return self._latest_values(df, series, config)
+
+    def calculate_configs(self, candles: List[Dict[str, Any]],
+                          names: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Latest WaveTrend + RSI values for several registered configs at once.
+
+        The candle frame and AP are built once, and EMAs/RSI are shared between
+        configs with the same periods. Configs needing more candles than are
+        available are left out of the result.
+        """
+        configs = [self.configs[name] for name in (names or self.configs) if name in self.configs]
+        configs = [c for c in configs if len(candles) >= c.min_candles]
+        if not configs:
+            return {}
+
+        df = self._candle_frame(candles)
+        close = df['close'].astype(float)
+        wt_cache: Dict[tuple, pd.Series] = {}
+        rsi_cache: Dict[int, Optional[float]] = {}
+
+        results = {}
+        for config in configs:
+            series = self.wave_trend_series(df['ap'], config.n1, config.n2, wt_cache)
+            values = self._latest_values(df, series, config)
+
+            if config.rsi_period not in rsi_cache:
+                if len(close) < config.rsi_period + 1:
+                    rsi_cache[config.rsi_period] = None
+                else:
+                    rsi = RSIIndicator(close=close, window=config.rsi_period, fillna=True).rsi()
+                    rsi_cache[config.rsi_period] = float(rsi.iloc[-1])
+            values['rsi'] = rsi_cache[config.rsi_period]
+
+            results[config.name] = values
+        return results
+
+    def calculate_series(self, candles: List[Dict[str, Any]],
+                         name: str = DEFAULT_CONFIG) -> Dict[str, List[Any]]:
+        """Full WT1/WT2/RSI history for one config, oldest first.
+
+        Values are None where an indicator is still warming up.
+        """
+        config = self.configs[name]
+        if len(candles) < config.min_candles:
+            raise ValueError(f"Not enough candles to calculate Wave Trend. Need at least {config.min_candles} candles, but got {len(candles)}")
+
+        df = self._candle_frame(candles)
+        series = self.wave_trend_series(df['ap'], config.n1, config.n2, {})
+        rsi = RSIIndicator(close=df['close'].astype(float), window=config.rsi_period, fillna=True).rsi()
+
+        def as_list(values: pd.Series) -> List[Optional[float]]:
+            return [None if pd.isna(v) else float(v) for v in values]
 
         return {
-            'ap': float(current['ap']),
-            'esa': float(current['esa']),
-            'd': float(current['d']),
-            'ci': float(current['ci']),
-            'wt1': float(current['wt1']),
-            'wt2': float(current['wt2']) if not pd.isna(current['wt2']) else 0.0,
-            'overbought1': float(current['wt1']) >= self.ob_level1,
-            'overbought2': float(current['wt1']) >= self.ob_level2,
-            'oversold1': float(current['wt1']) <= self.os_level1,
-            'oversold2': float(current['wt1']) <= self.os_level2,
-            'cross_over': previous is not None and float(current['wt1']) > float(current['wt2']) and float(previous['wt1']) <= float(previous['wt2']),
-            'cross_under': previous is not None and float(current['wt1']) < float(current['wt2']) and float(previous['wt1']) >= float(previous['wt2'])
+            'timestamp': [int(t) for t in df['timestamp']],
+            'wt1': as_list(series['wt1']),
+            'wt2': as_list(series['wt2']),
+            'rsi': as_list(rsi),
         }
 
 # Create singleton instance
-indicators = Indicators()
\ No newline at end of file
+indicators = Indicators()
+indicators.load_configs_from_env()
\ No newline at end of file
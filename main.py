@@ -1,13 +1,14 @@
+import time
+_PROCESS_START = time.monotonic()
+
 import asyncio
+import importlib
 import websocket_client
-from indicators import indicators
 import logging
+import os
 import signal
 import sys
-import time
-from datetime import datetime
 from typing import Dict, Any
-import json
 import random
 
 # Import the websocket_server module
@@ -27,6 +28,30 @@ logger = logging.getLogger(__name__)
 # Global flag for graceful shutdown
 is_running = True
 
+# Modules that pull in pandas/numpy/ta. They are loaded only after the
+# WebSocket server is accepting clients (see main()).
+HEAVY_MODULES = ['indicators']
+
+CACHE_STATS_INTERVAL = 300  # seconds between indicator cache stats log lines
+
+def rss_mb() -> float:
+    """Current resident set size of this process in MB"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def load_heavy_modules() -> None:
+    """Import the numeric stack (run in a worker thread)"""
+    for name in HEAVY_MODULES:
+        importlib.import_module(name)
+    websocket_server.numeric_ready.set()
+
 class TradingBot:
     def __init__(self):
         self.last_calculation_time: Dict[str, Dict[str, float]] = {}
@@ -34,14 +59,19 @@ class TradingBot:
             self.last_calculation_time[symbol] = {}
             for timeframe in websocket_client.TIMEFRAMES:
                 self.last_calculation_time[symbol][timeframe] = 0
+        self.last_stats_time = time.time()
         self.stop_event = asyncio.Event()
 
     async def calculate_and_log_indicators(self, symbol: str, timeframe: str) -> None:
         """Calculate and log indicators for a specific symbol and timeframe"""
         try:
-            wt = indicators.calculate_wave_trend(
-                websocket_client.candle_store[symbol][timeframe]
+            # Memoized on the stream version, so unchanged streams are free
+            results = websocket_client.get_indicator_results(
+                symbol, timeframe, [websocket_server.DEFAULT_CONFIG]
             )
+            wt = results.get(websocket_server.DEFAULT_CONFIG)
+            if wt is None:
+                raise ValueError(f"Not enough candles to calculate Wave Trend ({len(websocket_client.candle_store[symbol][timeframe])} available)")
             print(f"Wave Trend: {wt}")
 
             # rsi = indicators.calculate_rsi(
@@ -49,24 +79,15 @@ class TradingBot:
             # )
             # print(f"RSI: {rsi}")
             
-            # Broadcast the WT1 and WT2 values
+            # Broadcast the WT1 and WT2 values, built exactly like the feed
+            # thread's messages (they share the stream's cached snapshot)
             try:
-                # Get current price from candle data
-                candles = websocket_client.candle_store[symbol][timeframe]
-                current_price = candles[-1]['close'] if candles else 0
-
-                message = json.dumps({
-                    'type': 'indicators',
-                    'symbol': symbol,
-                    'timeframe': timeframe,
-                    'wt1': round(wt['wt1'], 2),
-                    'wt2': round(wt['wt2'], 2),
-                    'rsi': round(wt.get('rsi', 50), 2),
-                    'price': current_price,
-                    'timestamp': datetime.now().isoformat()
-                })
-                print(f"Preparing to broadcast: {message}")
-                await websocket_server.broadcast(message)
+                messages = websocket_client.build_indicator_messages(
+                    symbol, timeframe, [websocket_server.DEFAULT_CONFIG]
+                )
+                for config_name, key, message in messages:
+                    print(f"Preparing to broadcast: {message}")
+                    await websocket_server.broadcast(message, key=key, config=config_name)
             except Exception as broadcast_error:
                 logger.error(f"Error broadcasting message: {broadcast_error}")
             
@@ -90,20 +111,24 @@ class TradingBot:
             logger.error(f"Error calculating indicators for {symbol} {timeframe}: {str(e)}")
 
     async def periodic_calculation(self) -> None:
-        """Periodically calculate indicators for all symbols and timeframes"""
+        """Periodically calculate and log indicators for the always-on streams"""
         while is_running and not self.stop_event.is_set():
             try:
                 current_time = time.time()
                 
-                for symbol in websocket_client.SYMBOLS:
-                    for timeframe in websocket_client.TIMEFRAMES:
-                        # Convert timeframe to seconds
-                        interval_seconds = self.timeframe_to_seconds(timeframe)
-                        
-                        # Check if it's time to calculate
-                        if (current_time - self.last_calculation_time[symbol][timeframe]) >= interval_seconds:
-                            await self.calculate_and_log_indicators(symbol, timeframe)
-                            self.last_calculation_time[symbol][timeframe] = current_time
+                for symbol, timeframe in websocket_client.always_on_streams:
+                    # Convert timeframe to seconds
+                    interval_seconds = self.timeframe_to_seconds(timeframe)
+                    
+                    # Check if it's time to calculate
+                    if (current_time - self.last_calculation_time[symbol][timeframe]) >= interval_seconds:
+                        await self.calculate_and_log_indicators(symbol, timeframe)
+                        self.last_calculation_time[symbol][timeframe] = current_time
+
+                # Report indicator cache effectiveness
+                if current_time - self.last_stats_time >= CACHE_STATS_INTERVAL:
+                    logger.info(f"Indicator cache: {websocket_client.indicator_cache.stats()}")
+                    self.last_stats_time = current_time
                 
                 # Sleep for a short time to prevent CPU overuse
                 await asyncio.sleep(1)
@@ -138,8 +163,9 @@ class TradingBot:
             for timeframe in websocket_client.TIMEFRAMES:
                 logger.info(f"Fetching data for {symbol} {timeframe}")
                 await websocket_client.fetch_historical_candles(symbol, timeframe)
-                # Calculate initial indicators
-                await self.calculate_and_log_indicators(symbol, timeframe)
+                # Calculate initial indicators (other streams are computed on subscribe)
+                if websocket_client.is_always_on(symbol, timeframe):
+                    await self.calculate_and_log_indicators(symbol, timeframe)
 
     async def stop(self):
         """Stop the trading bot gracefully"""
@@ -155,6 +181,7 @@ def signal_handler(signum, frame):
     is_running = False
 
 async def main():
+    shm_publisher = None
     try:
         # Register signal handlers
         signal.signal(signal.SIGINT, signal_handler)
@@ -163,9 +190,39 @@ async def main():
         # Start WebSocket server
         websocket_server_task = asyncio.create_task(websocket_server.start_server())
 
-        # Give the server a moment to start before initializing the bot
-        await asyncio.sleep(0.5)
-        print("[MAIN] WebSocket server task created, starting bot initialization...", flush=True)
+        # Wait until the server is bound and serving the cached snapshot
+        ready_task = asyncio.create_task(websocket_server.get_server_ready().wait())
+        await asyncio.wait(
+            {websocket_server_task, ready_task},
+            return_when=asyncio.FIRST_COMPLETED
+        )
+        if websocket_server_task.done():
+            # Server exited before binding (e.g. port in use); surface the error
+            ready_task.cancel()
+            websocket_server_task.result()
+        logger.info(
+            f"Server ready in {(time.monotonic() - _PROCESS_START) * 1000:.0f} ms, "
+            f"RSS {rss_mb():.1f} MB"
+        )
+
+        # Load pandas/numpy/ta off the event loop now that clients can connect
+        import_start = time.monotonic()
+        await asyncio.to_thread(load_heavy_modules)
+        logger.info(
+            f"Numeric stack loaded in {(time.monotonic() - import_start) * 1000:.0f} ms, "
+            f"RSS {rss_mb():.1f} MB"
+        )
+        print("[MAIN] WebSocket server ready, starting bot initialization...", flush=True)
+
+        # Optionally mirror the store into shared memory for local readers
+        if os.environ.get('SHM_NAME'):
+            import shm_store
+            shm_publisher = shm_store.ShmStorePublisher(
+                os.environ['SHM_NAME'],
+                [(symbol, timeframe) for symbol in websocket_client.SYMBOLS for timeframe in websocket_client.TIMEFRAMES],
+                websocket_client.MAX_CANDLES
+            )
+            shm_publisher.start(websocket_client)
 
         # Create and initialize trading bot
         bot = TradingBot()
@@ -194,6 +251,8 @@ async def main():
         logger.error(f"An error occurred: {str(e)}")
         raise
     finally:
+        if shm_publisher:
+            shm_publisher.close()
         logger.info("Cleanup complete. Exiting...")
 
 if __name__ == "__main__":
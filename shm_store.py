@@ -0,0 +1,260 @@
+"""Publish the live candle/indicator store into named shared memory.
+
+Other processes on the same machine (a second broadcaster, analytics jobs,
+debugging tools) can map the segment and take consistent snapshots without
+attaching to the WebSocket feed or deserializing anything.
+
+Enable in the bot with SHM_NAME=<segment name>. Inspect from another process:
+    python shm_store.py <segment name> BTC_USDT 15m
+
+Layout (little endian):
+    header     64 bytes   magic, layout version, n_streams, capacity,
+                          n_fields, publisher pid, last update (ms)
+    directory  32 bytes per stream: symbol (24s), timeframe (8s)
+    streams    per stream a 32 byte header (seq, version, count, updated ms)
+               followed by one float64 column of `capacity` slots per field
+               in FIELDS, oldest bar first.
+
+Each stream is guarded by a seqlock: the publisher makes `seq` odd while it
+writes and even again when done, so a reader that sees the same even `seq`
+before and after copying has a consistent snapshot. Indicator columns hold
+the default config values as computed live (NaN where never computed).
+
+Readers only ever access the segment through a read-only view. Snapshots
+are one memcpy of a stream block; columns are float64 memoryviews into that
+copy (numpy.frombuffer(column) wraps one without copying).
+"""
+import logging
+import math
+import os
+import struct
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'WTSHM\x00\x00\x01'
+LAYOUT_VERSION = 1
+FIELDS = ['timestamp', 'open', 'high', 'low', 'close', 'volume', 'wt1', 'wt2', 'rsi']
+
+_HEADER = struct.Struct('<8sIIIIIxxxxQ')        # magic, layout, streams, capacity, fields, pid, updated
+_HEADER_SIZE = 64
+_DIRECTORY_ENTRY = struct.Struct('<24s8s')
+_STREAM_HEADER = struct.Struct('<QQIxxxxQ')     # seq, version, count, updated
+_STREAM_BODY = struct.Struct('<QIxxxxQ')        # the header without seq
+
+def _stream_block_size(capacity):
+    return _STREAM_HEADER.size + len(FIELDS) * capacity * 8
+
+def _segment_size(n_streams, capacity):
+    return _HEADER_SIZE + n_streams * _DIRECTORY_ENTRY.size + n_streams * _stream_block_size(capacity)
+
+class ShmStorePublisher:
+    """Producer side: owns the segment and rewrites streams that changed"""
+
+    def __init__(self, name, streams, capacity=500):
+        self.name = name
+        self.streams = list(streams)
+        self.capacity = capacity
+        self._index = {stream: i for i, stream in enumerate(self.streams)}
+        self._published = {}
+        self._layouts = {}
+        self._column = struct.Struct(f"<{capacity}d")
+        self._value = struct.Struct('<d')
+        self._stop = threading.Event()
+        self._thread = None
+        size = _segment_size(len(self.streams), capacity)
+
+        try:
+            # A previous run that crashed may have left the segment behind
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self._buf = self.shm.buf
+        # seq words are stored through a uint64 view: one aligned 8 byte store,
+        # where Struct.pack_into would zero the field before writing it
+        self._words = self._buf.cast('Q')
+
+        _HEADER.pack_into(self._buf, 0, MAGIC, LAYOUT_VERSION, len(self.streams),
+                          capacity, len(FIELDS), os.getpid(), 0)
+        for i, (symbol, timeframe) in enumerate(self.streams):
+            _DIRECTORY_ENTRY.pack_into(self._buf, _HEADER_SIZE + i * _DIRECTORY_ENTRY.size,
+                                       symbol.encode(), timeframe.encode())
+        logger.info(f"Publishing {len(self.streams)} streams to shared memory '{name}' ({size} bytes)")
+
+    def _block_offset(self, i):
+        return (_HEADER_SIZE + len(self.streams) * _DIRECTORY_ENTRY.size
+                + i * _stream_block_size(self.capacity))
+
+    def publish(self, symbol, timeframe, candles, version, history=None):
+        """Write one stream (candles newest first, as in candle_store).
+
+        When only the newest bar can have changed (same bar count, same newest
+        timestamp, same `history` marker) just its slot is rewritten; anything
+        else rewrites the whole stream. `history` should change whenever older
+        bars are replaced (backfill, gap repair).
+        """
+        i = self._index[(symbol, timeframe)]
+        offset = self._block_offset(i)
+        bars = list(reversed(candles[:self.capacity]))
+        layout = (len(bars), bars[-1]['timestamp'] if bars else None, history)
+        now_ms = int(time.time() * 1000)
+
+        def value(bar, field):
+            return float(bar[field]) if bar.get(field) is not None else math.nan
+
+        seq = self._words[offset // 8]
+        self._words[offset // 8] = seq + 1  # odd: write in progress
+
+        column_offset = offset + _STREAM_HEADER.size
+        if bars and self._layouts.get((symbol, timeframe)) == layout:
+            slot = (len(bars) - 1) * 8
+            for field in FIELDS:
+                self._value.pack_into(self._buf, column_offset + slot, value(bars[-1], field))
+                column_offset += self._column.size
+        else:
+            padding = [math.nan] * (self.capacity - len(bars))
+            for field in FIELDS:
+                self._column.pack_into(self._buf, column_offset, *[value(bar, field) for bar in bars], *padding)
+                column_offset += self._column.size
+            self._layouts[(symbol, timeframe)] = layout
+
+        _STREAM_BODY.pack_into(self._buf, offset + 8, version, len(bars), now_ms)
+        self._words[offset // 8] = seq + 2
+        self._words[(_HEADER.size - 8) // 8] = now_ms
+
+    def publish_changed(self, candle_store, stream_versions, computed_versions=None,
+                        history_versions=None, config='default'):
+        """Publish streams whose candles or default indicators changed"""
+        published = 0
+        for symbol, timeframe in self.streams:
+            marker = (stream_versions[symbol][timeframe],
+                      computed_versions.get((symbol, timeframe, config)) if computed_versions else None)
+            if self._published.get((symbol, timeframe)) == marker:
+                continue
+            history = history_versions[symbol][timeframe] if history_versions else None
+            self.publish(symbol, timeframe, candle_store[symbol][timeframe], marker[0], history)
+            self._published[(symbol, timeframe)] = marker
+            published += 1
+        return published
+
+    def start(self, client, interval=0.1):
+        """Poll websocket_client's store from a daemon thread and publish changes.
+
+        Polling keeps all shared memory work off the feed thread and coalesces
+        bursts of ticks into one write per stream per interval.
+        """
+        def run():
+            while not self._stop.is_set():
+                try:
+                    self.publish_changed(client.candle_store, client.stream_versions,
+                                         client.computed_versions, client.history_versions)
+                except Exception as e:
+                    logger.error(f"Error publishing to shared memory: {e}")
+                self._stop.wait(interval)
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def close(self):
+        """Stop the publishing thread, then release and unlink the segment"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self._words.release()
+        self.shm.close()
+        self.shm.unlink()
+
+class ShmStoreReader:
+    """Reader side: maps an existing segment and takes consistent snapshots.
+
+    SharedMemory always maps read-write, so all access goes through a
+    read-only view of the mapping; writing through it raises TypeError.
+    """
+
+    def __init__(self, name):
+        self.shm = shared_memory.SharedMemory(name=name)
+        if sys.version_info < (3, 13):
+            # Attaching registers the segment with this process's resource
+            # tracker, which would unlink it on exit; the publisher owns it.
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(self.shm._name, 'shared_memory')
+        self._buf = self.shm.buf.toreadonly()
+        self._words = self._buf.cast('Q')
+
+        magic, layout, n_streams, capacity, n_fields, pid, _ = _HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC or layout != LAYOUT_VERSION or n_fields != len(FIELDS):
+            raise ValueError(f"Shared memory '{name}' is not a compatible candle store")
+        self.capacity = capacity
+        self.publisher_pid = pid
+        self.streams = []
+        for i in range(n_streams):
+            symbol, timeframe = _DIRECTORY_ENTRY.unpack_from(self._buf, _HEADER_SIZE + i * _DIRECTORY_ENTRY.size)
+            self.streams.append((symbol.rstrip(b'\0').decode(), timeframe.rstrip(b'\0').decode()))
+        self._index = {stream: i for i, stream in enumerate(self.streams)}
+        self._block_size = _stream_block_size(capacity)
+        self._blocks_offset = _HEADER_SIZE + n_streams * _DIRECTORY_ENTRY.size
+
+    @property
+    def updated_ms(self):
+        return self._words[(_HEADER.size - 8) // 8]
+
+    def snapshot(self, symbol, timeframe, retries=1000):
+        """Consistent copy of one stream: {'version', 'updated_ms', field: column}.
+
+        Columns are read-only float64 memoryviews (oldest bar first) over a
+        single private copy of the stream block; nothing is unpacked.
+        """
+        offset = self._blocks_offset + self._index[(symbol, timeframe)] * self._block_size
+        block = self._buf[offset:offset + self._block_size]
+        for _ in range(retries):
+            seq = self._words[offset // 8]
+            if seq % 2:
+                time.sleep(0)
+                continue
+            data = bytes(block)  # single memcpy of the whole stream block
+            if self._words[offset // 8] != seq:
+                continue
+
+            _, version, count, updated_ms = _STREAM_HEADER.unpack_from(data, 0)
+            view = memoryview(data)
+            result = {'version': version, 'updated_ms': updated_ms}
+            for f, field in enumerate(FIELDS):
+                start = _STREAM_HEADER.size + f * self.capacity * 8
+                result[field] = view[start:start + count * 8].cast('d')
+            return result
+        raise TimeoutError(f"Could not take a consistent snapshot of {symbol} {timeframe}")
+
+    def close(self):
+        self._words.release()
+        self._buf.release()
+        self.shm.close()
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python shm_store.py <segment name> [SYMBOL TIMEFRAME]")
+        sys.exit(1)
+
+    reader = ShmStoreReader(sys.argv[1])
+    try:
+        if len(sys.argv) < 4:
+            print(f"{len(reader.streams)} streams, capacity {reader.capacity}, publisher pid {reader.publisher_pid}")
+            return
+        snap = reader.snapshot(sys.argv[2], sys.argv[3])
+        print(f"{sys.argv[2]} {sys.argv[3]}: version {snap['version']}, {len(snap['timestamp'])} bars")
+        for i in range(max(len(snap['timestamp']) - 10, 0), len(snap['timestamp'])):
+            values = [f"timestamp={int(snap['timestamp'][i])}"]
+            values += [f"{field}={snap[field][i]:.6g}" for field in FIELDS[1:]]
+            print('  ' + '  '.join(values))
+    finally:
+        reader.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Vectorized backtest series against the live indicator path"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import backtest
+from indicators import indicators
+
+BARS = 400
+HOLE = slice(200, 220)
+
+
+@pytest.fixture
+def wide():
+    """Random-walk OHLCV frames for three symbols; SYM1 misses 20 bars"""
+    rng = np.random.default_rng(0)
+    index = pd.date_range('2024-01-01', periods=BARS, freq='15min', tz='UTC')
+    columns = ['SYM0_USDT', 'SYM1_USDT', 'SYM2_USDT']
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, (BARS, len(columns))), axis=0))
+    spread = np.abs(rng.normal(0, 0.002, (BARS, len(columns)))) * close
+    frames = {
+        'open': np.roll(close, 1, axis=0),
+        'high': close + spread,
+        'low': close - spread,
+        'close': close,
+        'volume': np.ones((BARS, len(columns))),
+    }
+    wide = {field: pd.DataFrame(values, index=index, columns=columns) for field, values in frames.items()}
+    for frame in wide.values():
+        frame.iloc[HOLE, 1] = np.nan
+    return wide
+
+
+def live_series(wide, symbol):
+    """calculate_series on the candles the live store would hold for symbol"""
+    rows = wide['close'][symbol].notna()
+    candles = [
+        {'timestamp': int(ts.value // 10**6), **{f: float(wide[f].at[ts, symbol]) for f in backtest.PRICE_FIELDS}}
+        for ts in wide['close'].index[rows]
+    ]
+    return rows, indicators.calculate_series(candles)
+
+
+@pytest.mark.parametrize('symbol', ['SYM0_USDT', 'SYM1_USDT'])
+def test_series_match_live_path(wide, symbol):
+    series = backtest.compute_series(wide, [indicators.configs['default']])['default']
+    rows, live = live_series(wide, symbol)
+
+    for field in ('wt1', 'wt2', 'rsi'):
+        expected = np.array([np.nan if v is None else v for v in live[field]])
+        np.testing.assert_allclose(series[field][symbol][rows].to_numpy(), expected, equal_nan=True)
+
+
+def test_missing_bars_are_not_filled(wide):
+    series = backtest.compute_series(wide, [indicators.configs['default']])['default']
+    hole = wide['close'].index[HOLE]
+
+    for field in ('wt1', 'wt2', 'rsi'):
+        assert series[field].loc[hole, 'SYM1_USDT'].isna().all()
+        assert series[field].loc[hole, 'SYM0_USDT'].notna().all()
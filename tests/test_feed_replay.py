@@ -0,0 +1,126 @@
+"""Kline ingestion against the local stub of the MEXC feed (feed_replay.py)"""
+import asyncio
+import copy
+import threading
+import time
+
+import pytest
+
+import feed_replay
+import websocket_client
+
+SYMBOL = 'BTC_USDT'
+INTERVALS = ['Min1', 'Min60']
+BARS = 30
+PUSHES_PER_BAR = 4
+
+
+def expected_bars(frames, symbol, interval):
+    """Final OHLCV of each bar (last push wins), newest first like candle_store"""
+    bars = {}
+    for entry in frames:
+        data = entry['frame']['data']
+        if data['symbol'] == symbol and data['interval'] == interval:
+            bars[data['t'] * 1000] = data
+    return [bars[t] for t in sorted(bars, reverse=True)]
+
+
+def wait_for(condition, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+async def run_stub(frames, on_ready, stop):
+    """feed_replay.serve until stop is set, then close it cleanly"""
+    server = asyncio.ensure_future(feed_replay.serve(frames, 0, on_ready=on_ready))
+    await stop.wait()
+    server.cancel()
+    await asyncio.gather(server, return_exceptions=True)
+
+
+@pytest.fixture
+def stub_feed(monkeypatch):
+    """Start feed_replay.serve on an ephemeral port with the given frames and
+    connect websocket_client to it"""
+    loop = asyncio.new_event_loop()
+    loop_thread = threading.Thread(target=loop.run_forever, daemon=True)
+    loop_thread.start()
+    stop = asyncio.Event()
+    servers = []
+
+    def start(frames):
+        port_ready = threading.Event()
+        ports = []
+
+        def on_ready(port):
+            ports.append(port)
+            port_ready.set()
+
+        servers.append(asyncio.run_coroutine_threadsafe(
+            run_stub(frames, on_ready, stop), loop
+        ))
+        assert port_ready.wait(10), 'stub feed did not start'
+
+        monkeypatch.setattr(websocket_client, 'MEXC_WS_URL', f"ws://127.0.0.1:{ports[0]}")
+        monkeypatch.setattr(websocket_client, 'FEED_MODE', 'kline')
+        # No reconnect loop once the test closes the connection
+        monkeypatch.setattr(websocket_client, 'on_close', lambda ws, code, msg: None)
+        # Nothing is subscribed, so no indicator work either
+        monkeypatch.setattr(websocket_client, 'calculate_indicators', lambda symbol, timeframe: None)
+        for symbol in (SYMBOL, 'ETH_USDT'):
+            for timeframe in websocket_client.TIMEFRAMES:
+                monkeypatch.setitem(websocket_client.candle_store[symbol], timeframe, [])
+                monkeypatch.setitem(websocket_client.stream_versions[symbol], timeframe, 0)
+
+        threading.Thread(target=websocket_client.initialize_websocket, daemon=True).start()
+
+    yield start
+
+    if websocket_client.ws is not None:
+        websocket_client.ws.close()
+    loop.call_soon_threadsafe(stop.set)
+    for server in servers:
+        server.result(10)
+    loop.call_soon_threadsafe(loop.stop)
+    loop_thread.join(10)
+    loop.close()
+
+
+def test_replayed_klines_build_candles_and_versions(stub_feed):
+    frames = feed_replay.synthetic_frames([SYMBOL], INTERVALS, BARS, PUSHES_PER_BAR)
+
+    # The newest push repeated verbatim must not count as a change
+    duplicate = copy.deepcopy(frames[-1])
+    last_t = frames[-1]['t']
+    duplicate['t'] = last_t + 1
+    # A push on another stream marks the end of the replay
+    sentinel = {'t': last_t + 2, 'frame': {
+        'channel': 'push.kline', 'symbol': 'ETH_USDT',
+        'data': dict(duplicate['frame']['data'], symbol='ETH_USDT')
+    }}
+    stub_feed(frames + [duplicate, sentinel])
+
+    sentinel_timeframe = websocket_client.INTERVAL_TIMEFRAMES[sentinel['frame']['data']['interval']]
+    assert wait_for(lambda: websocket_client.stream_versions['ETH_USDT'][sentinel_timeframe] == 1), \
+        'replay did not reach the client'
+
+    for interval in INTERVALS:
+        timeframe = websocket_client.INTERVAL_TIMEFRAMES[interval]
+        candles = websocket_client.candle_store[SYMBOL][timeframe]
+        expected = expected_bars(frames, SYMBOL, interval)
+
+        assert len(candles) == BARS
+        for candle, bar in zip(candles, expected):
+            assert candle['timestamp'] == bar['t'] * 1000
+            assert candle['open'] == pytest.approx(bar['o'])
+            assert candle['high'] == pytest.approx(bar['h'])
+            assert candle['low'] == pytest.approx(bar['l'])
+            assert candle['close'] == pytest.approx(bar['c'])
+            assert candle['volume'] == pytest.approx(bar['q'])
+
+        # One bump per push that changed the stream; the duplicate adds none
+        assert websocket_client.stream_versions[SYMBOL][timeframe] == BARS * PUSHES_PER_BAR
@@ -0,0 +1,87 @@
+"""Gap detection and REST repair of candle streams (websocket_client)"""
+import pytest
+
+import websocket_client
+
+SYMBOL = 'BTC_USDT'
+TIMEFRAME = '15m'
+STEP = websocket_client.TIMEFRAME_MS[TIMEFRAME]
+BASE = 1_700_000_100_000 - 1_700_000_100_000 % STEP
+
+
+def bar(timestamp, close):
+    return {'timestamp': timestamp, 'open': close, 'high': close + 1, 'low': close - 1,
+            'close': close, 'volume': 10.0}
+
+
+def true_close(timestamp):
+    return 100.0 + (timestamp - BASE) // STEP
+
+
+@pytest.fixture
+def stream(monkeypatch):
+    """An empty BTC_USDT 15m stream, REST answered from true_close()"""
+    candles = []
+    monkeypatch.setitem(websocket_client.candle_store[SYMBOL], TIMEFRAME, candles)
+    monkeypatch.setitem(websocket_client.stream_versions[SYMBOL], TIMEFRAME, 0)
+    monkeypatch.setitem(websocket_client.history_versions[SYMBOL], TIMEFRAME, 0)
+    monkeypatch.setattr(websocket_client, 'calculate_indicators', lambda symbol, timeframe: None)
+
+    requests = []
+
+    def fetch_kline_range(symbol, timeframe, start_time, end_time):
+        requests.append((start_time * 1000, end_time * 1000))
+        return [bar(t, true_close(t)) for t in range(end_time * 1000, start_time * 1000 - 1, -STEP)]
+
+    monkeypatch.setattr(websocket_client, 'fetch_kline_range', fetch_kline_range)
+    return candles, requests
+
+
+def test_reconnect_repairs_gap_and_the_bar_cut_short(stream):
+    candles, requests = stream
+    # Ten good bars, then the outage cuts the last one short
+    candles.extend(bar(BASE + i * STEP, true_close(BASE + i * STEP)) for i in range(9, -1, -1))
+    cut_short = BASE + 9 * STEP
+    candles[0]['close'] = 999.0
+
+    # Reconnected 5 minutes into the bar 10 steps later; 9 bars are missing
+    now_ms = cut_short + 10 * STEP + 5 * 60 * 1000
+    assert websocket_client.find_gaps(SYMBOL, TIMEFRAME, now_ms) == [(cut_short + STEP, cut_short + 9 * STEP)]
+
+    repairer = websocket_client.GapRepairer(requests_per_second=1000)
+    assert repairer.repair(SYMBOL, TIMEFRAME, now_ms) == 10
+    assert requests == [(cut_short, cut_short + 9 * STEP)]
+
+    timestamps = [c['timestamp'] for c in candles]
+    assert timestamps == list(range(cut_short + 9 * STEP, BASE - 1, -STEP))
+    assert all(c['close'] == true_close(c['timestamp']) for c in candles)
+    assert websocket_client.find_gaps(SYMBOL, TIMEFRAME, now_ms) == []
+    assert websocket_client.stream_versions[SYMBOL][TIMEFRAME] == 1
+    assert websocket_client.history_versions[SYMBOL][TIMEFRAME] == 1
+
+
+def test_reconnect_within_next_bar_refetches_newest_bar(stream):
+    candles, requests = stream
+    candles.extend(bar(BASE + i * STEP, true_close(BASE + i * STEP)) for i in range(4, -1, -1))
+    candles[0]['close'] = 999.0
+
+    # The bar after it is forming: nothing missing, but the newest bar closed
+    now_ms = candles[0]['timestamp'] + STEP + 60 * 1000
+    assert websocket_client.find_gaps(SYMBOL, TIMEFRAME, now_ms) == []
+
+    repairer = websocket_client.GapRepairer(requests_per_second=1000)
+    assert repairer.repair(SYMBOL, TIMEFRAME, now_ms) == 1
+    assert requests == [(candles[0]['timestamp'], candles[0]['timestamp'])]
+    assert candles[0]['close'] == true_close(candles[0]['timestamp'])
+
+
+def test_merge_keeps_the_forming_bar(stream):
+    candles, _ = stream
+    forming = BASE + 5 * STEP
+    candles.extend(bar(BASE + i * STEP, true_close(BASE + i * STEP)) for i in range(5, -1, -1))
+    candles[0]['close'] = 555.0  # live value, newer than anything REST has
+
+    fetched = [bar(t, true_close(t)) for t in (forming, forming - STEP)]
+    assert websocket_client.merge_candles(SYMBOL, TIMEFRAME, fetched, now_ms=forming + 60 * 1000) == 0
+    assert candles[0]['close'] == 555.0
+    assert websocket_client.stream_versions[SYMBOL][TIMEFRAME] == 0
@@ -0,0 +1,101 @@
+"""HTTP query API: ETag / 304 handling and parameter validation"""
+import asyncio
+import json
+import random
+
+import pytest
+
+import http_api
+import indicators  # noqa: F401  (the API answers 503 until this is loaded)
+import websocket_client
+import websocket_server
+
+SYMBOL = 'BTC_USDT'
+TIMEFRAME = '15m'
+STEP = websocket_client.TIMEFRAME_MS[TIMEFRAME]
+
+
+def request(path, etag=None):
+    headers = {'If-None-Match': etag} if etag else {}
+    status, response_headers, body = asyncio.run(http_api.process_request(path, headers))
+    return int(status), dict(response_headers), json.loads(body) if body else None
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """200 random-walk candles for BTC_USDT 15m, numeric stack marked ready"""
+    rng = random.Random(0)
+    price = 100.0
+    candles = []
+    for i in range(200):
+        price *= 1 + rng.gauss(0, 0.01)
+        candles.insert(0, {'timestamp': i * STEP, 'open': price, 'high': price * 1.01,
+                           'low': price * 0.99, 'close': price, 'volume': 1.0})
+    monkeypatch.setitem(websocket_client.candle_store[SYMBOL], TIMEFRAME, candles)
+    monkeypatch.setitem(websocket_client.stream_versions[SYMBOL], TIMEFRAME, 1)
+    monkeypatch.setattr(websocket_client, 'last_prices', {})
+    monkeypatch.setattr(websocket_client, 'indicator_cache', websocket_client.IndicatorCache())
+
+    websocket_server.numeric_ready.set()
+    yield candles
+    websocket_server.numeric_ready.clear()
+
+
+def test_candles_etag(store):
+    path = f"/api/candles?symbol={SYMBOL}&timeframe={TIMEFRAME}&limit=50"
+    status, headers, body = request(path)
+    assert status == 200
+    assert len(body['candles']) == 50
+    assert body['candles'][-1]['close'] == store[0]['close']
+    assert body['candles'][-1]['wt1'] is not None
+
+    assert request(path, headers['ETag'])[0] == 304
+
+    websocket_client.bump_version(SYMBOL, TIMEFRAME)
+    status, new_headers, _ = request(path, headers['ETag'])
+    assert status == 200
+    assert new_headers['ETag'] != headers['ETag']
+
+
+def test_screen_etag_follows_versions_and_prices(store):
+    path = f"/api/screen?timeframe={TIMEFRAME}"
+    status, headers, body = request(path)
+    assert status == 200
+    assert [row['symbol'] for row in body['results']] == [SYMBOL]
+
+    etag = headers['ETag']
+    assert request(path, etag)[0] == 304
+
+    websocket_client.last_prices[SYMBOL] = 123.0
+    status, headers, body = request(path, etag)
+    assert status == 200
+    assert body['results'][0]['price'] == 123.0
+
+    etag = headers['ETag']
+    websocket_client.bump_version(SYMBOL, TIMEFRAME)
+    assert request(path, etag)[0] == 200
+
+
+@pytest.mark.parametrize('path, status', [
+    ('/api/candles?symbol=NOPE_USDT&timeframe=15m', 404),
+    ('/api/candles?symbol=BTC_USDT&timeframe=2m', 400),
+    ('/api/candles?symbol=BTC_USDT&timeframe=15m&limit=abc', 400),
+    ('/api/candles?symbol=BTC_USDT&timeframe=15m&limit=0', 400),
+    ('/api/candles?symbol=BTC_USDT&timeframe=15m&config=nope', 404),
+    ('/api/screen', 400),
+    ('/api/screen?timeframe=15m&sort=volume', 400),
+    ('/api/screen?timeframe=15m&order=up', 400),
+    ('/api/screen?timeframe=15m&min_wt1=low', 400),
+    ('/api/nope', 404),
+])
+def test_validation_errors(store, path, status):
+    got, _, body = request(path)
+    assert got == status
+    assert body['error']
+
+
+def test_not_ready_until_numeric_stack_loaded(store):
+    websocket_server.numeric_ready.clear()
+    status, headers, _ = request(f"/api/screen?timeframe={TIMEFRAME}")
+    assert status == 503
+    assert headers['Retry-After'] == '1'
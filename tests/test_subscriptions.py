@@ -0,0 +1,131 @@
+"""Client subscriptions: validation, demand tracking and broadcast routing"""
+import asyncio
+import json
+
+import pytest
+
+import websocket_client
+import websocket_server
+
+
+class FakeClient:
+    """Stands in for a server-side connection: replays incoming messages,
+    records what the server sends"""
+
+    remote_address = ('127.0.0.1', 0)
+
+    def __init__(self, incoming=()):
+        self.incoming = [json.dumps(m) if not isinstance(m, str) else m for m in incoming]
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+    async def __aiter__(self):
+        for message in self.incoming:
+            yield message
+
+    def replies(self, kind):
+        return [m for m in self.sent if m.get('type') == kind]
+
+
+@pytest.fixture(autouse=True)
+def server_state(monkeypatch):
+    """Fresh subscription state; nothing always on, nothing cached"""
+    monkeypatch.setattr(websocket_server, 'connected_clients', set())
+    monkeypatch.setattr(websocket_server, 'client_configs', {})
+    monkeypatch.setattr(websocket_server, 'config_subscribers', {})
+    monkeypatch.setattr(websocket_server, 'client_streams', {})
+    monkeypatch.setattr(websocket_server, 'batch_clients', set())
+    monkeypatch.setattr(websocket_server, 'latest_messages', {})
+    monkeypatch.setattr(websocket_server, '_demand', [])
+    monkeypatch.setattr(websocket_client, '_always_on', set())
+
+    sent = []
+    monkeypatch.setattr(websocket_server.websockets, 'broadcast',
+                        lambda clients, message: sent.append((set(clients), json.loads(message))))
+    return sent
+
+
+def subscribe(*requests):
+    """Run handle_client for a client sending these subscribes; its subscribed replies"""
+    client = FakeClient([{'type': 'subscribe', **request} for request in requests])
+    asyncio.run(websocket_server.handle_client(client))
+    return client.replies('subscribed')
+
+
+def test_parse_stream_names():
+    known = set(websocket_client.SYMBOLS)
+    assert websocket_server.parse_stream_names('BTC_USDT', known) == (None, 'BTC_USDT')
+    assert websocket_server.parse_stream_names(['BTC_USDT', 'NOPE_USDT', 3], known) == \
+        (frozenset({'BTC_USDT'}), ['NOPE_USDT', 3])
+    assert websocket_server.parse_stream_names(['NOPE_USDT'], known) == (None, ['NOPE_USDT'])
+    assert websocket_server.parse_stream_names([], known) == (frozenset(), [])
+
+
+def test_string_instead_of_list_is_rejected_and_setting_kept():
+    first, second = subscribe({'symbols': ['ETH_USDT'], 'timeframes': ['15m']}, {'symbols': 'BTC_USDT'})
+    assert first['symbols'] == ['ETH_USDT']
+    assert second['rejected'] == {'symbols': 'BTC_USDT'}
+    # Not a set of single characters, and not silently "nothing"
+    assert second['symbols'] == ['ETH_USDT']
+    assert second['timeframes'] == ['15m']
+
+
+def test_unknown_names_are_dropped_and_reported():
+    [reply] = subscribe({'symbols': ['BTC_USDT', 'NOPE_USDT'], 'timeframes': ['15m', '2m']})
+    assert reply['symbols'] == ['BTC_USDT']
+    assert reply['timeframes'] == ['15m']
+    assert reply['rejected'] == {'symbols': ['NOPE_USDT'], 'timeframes': ['2m']}
+
+
+def test_empty_list_means_all():
+    restricted, everything = subscribe({'symbols': ['BTC_USDT']}, {'symbols': []})
+    assert restricted['symbols'] == ['BTC_USDT']
+    assert everything['symbols'] == []
+    assert everything['rejected'] == {}
+
+    client = object()
+    websocket_server.add_client(client)
+    websocket_server.set_client_streams(client, [], [])
+    assert websocket_server.client_streams[client] == websocket_server.ALL_STREAMS
+
+
+def test_legacy_client_receives_every_stream(server_state):
+    legacy, btc_15m = object(), object()
+    websocket_server.add_client(legacy)
+    websocket_server.add_client(btc_15m)
+    websocket_server.set_client_streams(btc_15m, ['BTC_USDT'], ['15m'])
+
+    streams = [('BTC_USDT', '15m'), ('BTC_USDT', '1h'), ('ETH_USDT', '1m')]
+    for symbol, timeframe in streams:
+        message = json.dumps({'symbol': symbol, 'timeframe': timeframe})
+        asyncio.run(websocket_server.broadcast(message, key=(symbol, timeframe, websocket_server.DEFAULT_CONFIG)))
+
+    received = {(m['symbol'], m['timeframe']): clients for clients, m in server_state}
+    assert set(received) == set(streams)
+    assert received[('BTC_USDT', '15m')] == {legacy, btc_15m}
+    assert received[('BTC_USDT', '1h')] == {legacy}
+    assert received[('ETH_USDT', '1m')] == {legacy}
+
+
+def test_unwatched_stream_is_not_computed(monkeypatch):
+    computed = []
+    monkeypatch.setattr(websocket_client, 'build_indicator_messages',
+                        lambda symbol, timeframe, configs: computed.append((symbol, timeframe, set(configs))) or [])
+
+    client = object()
+    websocket_server.add_client(client)
+    websocket_server.set_client_streams(client, ['BTC_USDT'], ['15m'])
+
+    assert websocket_server.demanded_configs('BTC_USDT', '15m') == {websocket_server.DEFAULT_CONFIG}
+    assert websocket_server.demanded_configs('ETH_USDT', '1m') == set()
+
+    websocket_client.calculate_indicators('ETH_USDT', '1m')
+    websocket_client.calculate_indicators('BTC_USDT', '15m')
+    assert computed == [('BTC_USDT', '15m', {websocket_server.DEFAULT_CONFIG})]
+
+    # Once the last watcher leaves, nothing is computed at all
+    websocket_server.remove_client(client)
+    websocket_client.calculate_indicators('BTC_USDT', '15m')
+    assert len(computed) == 1
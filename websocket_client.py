@@ -1,11 +1,15 @@
 import websocket
 import json
+import os
 import time
-import requests
+import threading
+from collections import OrderedDict
 from datetime import datetime
-import indicators
 import asyncio
 import websocket_server
+# NOTE: `requests` and `indicators` (pandas/numpy/ta) are imported lazily inside
+# the functions that use them so the WebSocket server can bind and serve the
+# cached snapshot before the heavy numeric stack is loaded.
 # Configuration
 SYMBOLS = [
     'INJ_USDT',
@@ -71,10 +75,83 @@ CANDLE_INTERVALS = {
     '1h': 'Min60',
     '4h': 'Hour4'
 }
+INTERVAL_TIMEFRAMES = {interval: timeframe for timeframe, interval in CANDLE_INTERVALS.items()}
+TIMEFRAME_MS = {
+    '1m': 60 * 1000,
+    '5m': 5 * 60 * 1000,
+    '15m': 15 * 60 * 1000,
+    '1h': 60 * 60 * 1000,
+    '4h': 4 * 60 * 60 * 1000
+}
+
+MEXC_KLINE_URL = 'https://contract.mexc.com/api/v1/contract/kline'
+
+MEXC_WS_URL = os.environ.get('MEXC_WS_URL', 'wss://contract.mexc.com/edge')
+
+# 'kline': apply the exchange's pushed bars per symbol/interval (correct
+# high/low/volume). 'ticker': synthesize candles from lastPrice ticks.
+FEED_MODE = os.environ.get('FEED_MODE', 'kline')
+
+# In kline mode, also subscribe to tickers purely for price display
+TICKER_PRICES = os.environ.get('TICKER_PRICES', '0').lower() in ('1', 'true', 'yes')
+
+MAX_CANDLES = 500
 
 # Data structure to store candles
 candle_store = {}
 
+# Latest traded price per symbol (ticker feed), used for display only
+last_prices = {}
+
+# Guards structural changes to candle lists (new bars vs. gap repair merges)
+store_lock = threading.Lock()
+
+# Per-stream version, bumped only when a stream's OHLC data actually changes.
+# Indicator results are memoized against it (see IndicatorCache).
+stream_versions = {}
+
+# Per-stream counter bumped when bars other than the newest are rewritten
+# (backfill, gap repair), for consumers that mirror the store incrementally
+history_versions = {}
+
+# Streams whose default indicators are always computed, with or without
+# subscribers (signal logging in main.py). Comma separated SYMBOL:TIMEFRAME
+# entries where either side may be '*', e.g. '*:15m,BTC_USDT:*'. The
+# fast-moving 1m/5m/15m streams are only computed while someone watches them.
+ALWAYS_ON_STREAMS = os.environ.get('ALWAYS_ON_STREAMS', '*:1h,*:4h')
+
+# (symbol, timeframe, config) -> stream version the last broadcast was computed from
+computed_versions = {}
+
+def parse_stream_patterns(spec):
+    """Expand a SYMBOL:TIMEFRAME pattern list into concrete streams"""
+    streams = []
+    for entry in spec.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        symbol_pattern, _, timeframe_pattern = entry.partition(':')
+        timeframe_pattern = timeframe_pattern or '*'
+        for symbol in SYMBOLS:
+            for timeframe in TIMEFRAMES:
+                if (symbol_pattern in ('*', symbol) and timeframe_pattern in ('*', timeframe)
+                        and (symbol, timeframe) not in streams):
+                    streams.append((symbol, timeframe))
+    return streams
+
+always_on_streams = parse_stream_patterns(ALWAYS_ON_STREAMS)
+_always_on = set(always_on_streams)
+
+def is_always_on(symbol, timeframe):
+    return (symbol, timeframe) in _always_on
+
+def wanted_configs(symbol, timeframe):
+    """Indicator configs that must be kept current for a stream right now"""
+    configs = websocket_server.demanded_configs(symbol, timeframe)
+    if is_always_on(symbol, timeframe):
+        configs.add(websocket_server.DEFAULT_CONFIG)
+    return configs
+
 def convert_symbol_format(symbol, to_websocket=False):
     if to_websocket:
         return symbol.replace('_', '')  # INJ_USDT -> INJUSDT
@@ -84,11 +161,143 @@ def convert_symbol_format(symbol, to_websocket=False):
 # Initialize candle store structure
 for symbol in SYMBOLS:
     candle_store[symbol] = {}
+    stream_versions[symbol] = {}
+    history_versions[symbol] = {}
     for timeframe in TIMEFRAMES:
         candle_store[symbol][timeframe] = []
+        stream_versions[symbol][timeframe] = 0
+        history_versions[symbol][timeframe] = 0
+
+def bump_version(symbol, timeframe):
+    """Mark a stream's candles as changed"""
+    stream_versions[symbol][timeframe] += 1
+
+class IndicatorCache:
+    """Small LRU of indicator results keyed by (symbol, timeframe, version, config).
+
+    The feed thread and the periodic loop in main.py both ask for the same
+    streams; whichever comes second for an unchanged version gets the
+    memoized result.
+    """
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'entries': len(self._entries)
+            }
+
+indicator_cache = IndicatorCache()
+
+def get_indicator_results(symbol, timeframe, config_names=None):
+    """Indicator results per config for a stream, memoized on its version"""
+    import indicators
+
+    # Read the version before computing so a concurrent update is never
+    # cached under the newer version
+    version = stream_versions[symbol][timeframe]
+    names = config_names or list(indicators.indicators.configs)
+    candles = candle_store[symbol][timeframe]
+
+    results = {}
+    missing = []
+    for name in names:
+        config = indicators.indicators.configs.get(name)
+        # Too little history yet: no result, and no lookup to count as a miss
+        if config is None or len(candles) < config.min_candles:
+            continue
+        cached = indicator_cache.get((symbol, timeframe, version, config.key))
+        if cached is not None:
+            results[name] = cached
+        else:
+            missing.append(name)
+
+    if missing:
+        computed = indicators.indicators.calculate_configs(candles, missing)
+        for name, values in computed.items():
+            indicator_cache.put((symbol, timeframe, version, indicators.indicators.configs[name].key), values)
+            results[name] = values
+    return results
+
+def get_indicator_series(symbol, timeframe, config_name):
+    """Full indicator history for a stream, memoized on its version"""
+    import indicators
+
+    version = stream_versions[symbol][timeframe]
+    config = indicators.indicators.configs[config_name]
+    candles = candle_store[symbol][timeframe]
+    if len(candles) < config.min_candles:
+        raise ValueError(f"Not enough candles for {config_name}: need {config.min_candles}, have {len(candles)}")
+    key = (symbol, timeframe, version, config.key, 'series')
+    series = indicator_cache.get(key)
+    if series is None:
+        series = indicators.indicators.calculate_series(candles, config_name)
+        indicator_cache.put(key, series)
+    return version, series
+
+def fetch_kline_range(symbol, timeframe, start_time, end_time):
+    """Fetch candles for [start_time, end_time] (seconds) from the REST API, newest first"""
+    import requests
+
+    interval = CANDLE_INTERVALS[timeframe]
+    url = f"{MEXC_KLINE_URL}/{symbol}?interval={interval}&start={start_time}&end={end_time}"
+
+    #print('Query:', url)
+    response = requests.get(url, timeout=10)
+    data = response.json()
+
+    # The response has arrays for each field
+    time_data = data['data']['time']
+    open_data = data['data']['open']
+    high_data = data['data']['high']
+    low_data = data['data']['low']
+    close_data = data['data']['close']
+    vol_data = data['data']['vol']
+
+    # Create candles by combining the arrays
+    candles = [
+        {
+            'timestamp': int(t) * 1000,
+            'open': float(o),
+            'high': float(h),
+            'low': float(l),
+            'close': float(c),
+            'volume': float(v)
+        }
+        for t, o, h, l, c, v in zip(time_data, open_data, high_data, low_data, close_data, vol_data)
+    ]
+
+    # Sort candles by timestamp in descending order (newest first)
+    candles.sort(key=lambda x: x['timestamp'], reverse=True)
+    return candles
 
 async def fetch_historical_candles(symbol, timeframe):
-    api_symbol = symbol
     now = int(time.time())
     
     # Adjust the lookback period based on timeframe
@@ -103,48 +312,168 @@ async def fetch_historical_candles(symbol, timeframe):
     period = hours_lookback[timeframe] * 60 * 60  # Convert hours to seconds
     start_time = now - period
     
-    interval = CANDLE_INTERVALS[timeframe]
-    url = f"https://contract.mexc.com/api/v1/contract/kline/{api_symbol}?interval={interval}&start={start_time}&end={now}"
-    
     try:
-        #print('Query:', url)
         # Run synchronous requests.get in a thread to avoid blocking event loop
-        response = await asyncio.to_thread(requests.get, url)
-        data = response.json()
-        
-        # Log the raw response structure
-        #print('Raw response data:', json.dumps(data, indent=2))
-        
-        # The response has arrays for each field
-        time_data = data['data']['time']
-        open_data = data['data']['open']
-        high_data = data['data']['high']
-        low_data = data['data']['low']
-        close_data = data['data']['close']
-        vol_data = data['data']['vol']
-        
-        # Create candles by combining the arrays
-        candles = [
-            {
-                'timestamp': int(t) * 1000,
-                'open': float(o),
-                'high': float(h),
-                'low': float(l),
-                'close': float(c),
-                'volume': float(v)
-            }
-            for t, o, h, l, c, v in zip(time_data, open_data, high_data, low_data, close_data, vol_data)
-        ]
+        candles = await asyncio.to_thread(fetch_kline_range, symbol, timeframe, start_time, now)
         
         print(f"Processed {len(candles)} candles for {symbol} {timeframe}")
         
-        # Sort candles by timestamp in descending order (newest first)
-        candles.sort(key=lambda x: x['timestamp'], reverse=True)
-        candle_store[symbol][timeframe] = candles
+        with store_lock:
+            candle_store[symbol][timeframe] = candles
+            history_versions[symbol][timeframe] += 1
+            bump_version(symbol, timeframe)
         
     except Exception as error:
         print(f"Error fetching historical candles for {symbol} {timeframe}:", str(error))
 
+def find_gaps(symbol, timeframe, now_ms=None):
+    """Missing bar ranges of a stream as [(first_missing_ms, last_missing_ms)].
+
+    Looks between consecutive stored bars and between the newest stored bar
+    and the bar open right now (which is still forming and not counted).
+    """
+    step = TIMEFRAME_MS[timeframe]
+    candles = candle_store[symbol][timeframe]
+    if not candles:
+        return []
+
+    now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+    current_bar = now_ms - now_ms % step
+
+    gaps = []
+    newer = current_bar
+    for candle in candles:
+        if newer - candle['timestamp'] > step:
+            gaps.append((candle['timestamp'] + step, newer - step))
+        newer = candle['timestamp']
+    return sorted(gaps)
+
+def merge_candles(symbol, timeframe, fetched, now_ms=None):
+    """Merge repaired bars into a stream, newest first, and bump its version.
+
+    Fetched bars fill missing timestamps and replace stored bars with the same
+    timestamp (they may have been cut short by the outage), except the bar
+    forming right now, which the live feed keeps updating. After a reconnect
+    the newest stored bar is usually an older, closed one and gets replaced.
+    """
+    if not fetched:
+        return 0
+    step = TIMEFRAME_MS[timeframe]
+    now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+    live_timestamp = now_ms - now_ms % step
+    with store_lock:
+        candles = candle_store[symbol][timeframe]
+        by_timestamp = {c['timestamp']: c for c in candles}
+        changed = 0
+        for candle in fetched:
+            if candle['timestamp'] == live_timestamp:
+                continue
+            existing = by_timestamp.get(candle['timestamp'])
+            if existing is None or any(existing[f] != candle[f] for f in ('open', 'high', 'low', 'close', 'volume')):
+                by_timestamp[candle['timestamp']] = candle
+                changed += 1
+        if changed:
+            merged = sorted(by_timestamp.values(), key=lambda c: c['timestamp'], reverse=True)
+            # Mutate in place so readers holding the list see the repair
+            candles[:] = merged[:MAX_CANDLES]
+            history_versions[symbol][timeframe] += 1
+            bump_version(symbol, timeframe)
+    return changed
+
+class GapRepairer:
+    """Background worker that backfills missing bars with targeted REST fetches.
+
+    Streams are queued after a feed reconnect, a clock jump or a skipped bar.
+    One worker serves all symbols, merges each stream's gaps into as few
+    range requests as possible and keeps to a shared request rate.
+    """
+
+    def __init__(self, requests_per_second=5.0, max_bars_per_request=2000):
+        self.min_interval = 1.0 / requests_per_second
+        self.max_bars_per_request = max_bars_per_request
+        self.repaired_bars = 0
+        self.requests = 0
+        self._pending = OrderedDict()
+        self._condition = threading.Condition()
+        self._last_request = 0.0
+        self._thread = None
+
+    def schedule(self, symbol, timeframe):
+        with self._condition:
+            self._pending[(symbol, timeframe)] = True
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def schedule_all(self, reason):
+        print(f"Checking all streams for gaps ({reason})")
+        for symbol in SYMBOLS:
+            for timeframe in TIMEFRAMES:
+                if candle_store[symbol][timeframe]:
+                    self.schedule(symbol, timeframe)
+
+    def _batches(self, timeframe, gaps):
+        """Group gaps into request ranges of at most max_bars_per_request bars"""
+        step = TIMEFRAME_MS[timeframe]
+        batches = []
+        for first, last in gaps:
+            if batches and (last - batches[-1][0]) // step < self.max_bars_per_request:
+                batches[-1] = (batches[-1][0], last)
+            else:
+                batches.append((first, last))
+        return batches
+
+    def _throttle(self):
+        wait = self._last_request + self.min_interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self._last_request = time.monotonic()
+
+    def repair(self, symbol, timeframe, now_ms=None):
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        step = TIMEFRAME_MS[timeframe]
+        candles = candle_store[symbol][timeframe]
+        if not candles:
+            return 0
+        gaps = find_gaps(symbol, timeframe, now_ms)
+
+        # Include the bar before each gap: it was likely cut short too
+        ranges = [(first - step, last) for first, last in self._batches(timeframe, gaps)]
+        newest = candles[0]['timestamp']
+        if not gaps and newest < now_ms - now_ms % step:
+            # Nothing missing, but the newest bar closed while we were away
+            # and may lack its final pushes
+            ranges = [(newest, newest)]
+        if not ranges:
+            return 0
+
+        repaired = 0
+        for start, end in ranges:
+            self._throttle()
+            self.requests += 1
+            fetched = fetch_kline_range(symbol, timeframe, start // 1000, end // 1000)
+            repaired += merge_candles(symbol, timeframe, fetched, now_ms)
+        if repaired:
+            self.repaired_bars += repaired
+            print(f"Repaired {repaired} bars for {symbol} {timeframe} ({len(gaps)} gaps)")
+            # Indicators are recomputed over the repaired history
+            calculate_indicators(symbol, timeframe)
+        return repaired
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                (symbol, timeframe), _ = self._pending.popitem(last=False)
+            try:
+                self.repair(symbol, timeframe)
+            except Exception as error:
+                print(f"Error repairing gaps for {symbol} {timeframe}: {error}")
+
+gap_repairer = GapRepairer(float(os.environ.get('REPAIR_REQUESTS_PER_SECOND', 5)))
+
 # WebSocket connection handling
 ws = None
 
@@ -155,29 +484,32 @@ def on_message(ws, message):
         if isinstance(message_data, str):
             message_data = json.loads(message_data)
         
-        if message_data.get('channel') == "pong":
+        channel = message_data.get('channel')
+        if channel == "pong":
             print('Received pong:', message_data.get('data'))
             return
 
+        if channel and channel.startswith('rs.'):
+            # Subscription acknowledgements ({"channel": "rs.sub.kline", "data": "success"})
+            return
+
+        if channel == 'push.kline':
+            apply_kline(message_data['data'])
+            return
+
+        if FEED_MODE == 'kline':
+            if channel == 'push.ticker' and message_data.get('data', {}).get('lastPrice'):
+                last_prices[message_data.get('symbol')] = float(message_data['data']['lastPrice'])
+            return
+
         if message_data.get('data') and message_data['data'].get('lastPrice'):
             # Get the current price and timestamp
             symbol = message_data.get('symbol')
             timestamp = message_data['data'].get('timestamp')
             price = float(message_data['data'].get('lastPrice'))
             
-            # Update the latest candle with the new price
-            for timeframe in TIMEFRAMES:
-                if symbol in candle_store and timeframe in candle_store[symbol]:
-                    candles = candle_store[symbol][timeframe]
-                    if candles:
-                        candles[0]['close'] = price
-                        candles[0]['high'] = max(candles[0]['high'], price)
-                        candles[0]['low'] = min(candles[0]['low'], price)
-                        
-                        # Calculate and broadcast indicators immediately
-                        calculate_indicators(symbol, timeframe)
-            
-            # Also process regular candle updates
+            # Update (or roll) the candle for every timeframe; indicators are
+            # recalculated and broadcast only for streams whose OHLC changed
             processed_data = {
                 's': symbol,
                 't': timestamp,
@@ -199,14 +531,31 @@ def on_close(ws, close_status_code, close_msg):
     time.sleep(5)
     initialize_websocket()
 
+_has_connected = False
+
+# A ping loop iteration taking this much longer than its 15s sleep means the
+# process was paused or the clock jumped (e.g. machine suspend/resume)
+CLOCK_JUMP_SECONDS = 30
+
 def on_open(ws):
+    global _has_connected
     print('WebSocket connected')
+
+    if _has_connected:
+        # Bars pushed while we were disconnected are lost; backfill them
+        gap_repairer.schedule_all('feed reconnected')
+    _has_connected = True
     
     def send_ping():
         while True:
             if ws.sock and ws.sock.connected:
                 ws.send(json.dumps({"method": "ping"}))
+            started_wall, started_mono = time.time(), time.monotonic()
             time.sleep(15)
+            drift = abs((time.time() - started_wall) - 15)
+            stall = (time.monotonic() - started_mono) - 15
+            if drift > CLOCK_JUMP_SECONDS or stall > CLOCK_JUMP_SECONDS:
+                gap_repairer.schedule_all('clock jump')
     
     # Start ping thread
     import threading
@@ -215,6 +564,20 @@ def on_open(ws):
     ping_thread.start()
     
     for pair in SYMBOLS:
+        if FEED_MODE == 'kline':
+            for timeframe in TIMEFRAMES:
+                kline_subscription = {
+                    "method": "sub.kline",
+                    "param": {
+                        "symbol": pair,
+                        "interval": CANDLE_INTERVALS[timeframe]
+                    }
+                }
+                ws.send(json.dumps(kline_subscription))
+            print(f"Subscribed to klines for {pair}")
+            if not TICKER_PRICES:
+                continue
+
         ticker_subscription = {
             "method": "sub.ticker",
             "param": {
@@ -228,7 +591,7 @@ def initialize_websocket():
     global ws
     websocket.enableTrace(False)
     ws = websocket.WebSocketApp(
-        'wss://contract.mexc.com/edge',
+        MEXC_WS_URL,
         on_message=on_message,
         on_error=on_error,
         on_close=on_close,
@@ -236,6 +599,56 @@ def initialize_websocket():
     )
     ws.run_forever()
 
+def apply_kline(bar):
+    """Apply one pushed kline bar to the store.
+
+    Push format: {"symbol": "BTC_USDT", "interval": "Min60", "t": 1587448800,
+    "o": ..., "h": ..., "l": ..., "c": ..., "q": volume, "a": amount}
+    """
+    try:
+        symbol = bar['symbol']
+        timeframe = INTERVAL_TIMEFRAMES.get(bar['interval'])
+        if symbol not in candle_store or timeframe not in TIMEFRAMES:
+            return
+
+        candle = {
+            'timestamp': int(bar['t']) * 1000,
+            'open': float(bar['o']),
+            'high': float(bar['h']),
+            'low': float(bar['l']),
+            'close': float(bar['c']),
+            'volume': float(bar['q'])
+        }
+        candles = candle_store[symbol][timeframe]
+
+        if not candles or candles[0]['timestamp'] < candle['timestamp']:
+            # A new bar opened; more than one step means bars were skipped
+            skipped = bool(candles) and candle['timestamp'] - candles[0]['timestamp'] > TIMEFRAME_MS[timeframe]
+            with store_lock:
+                candles.insert(0, candle)
+                if len(candles) > MAX_CANDLES:
+                    candles.pop()
+            if skipped:
+                gap_repairer.schedule(symbol, timeframe)
+        else:
+            # Update the bar in place (normally the newest; a late final
+            # push for the previous bar is also accepted)
+            existing = next((c for c in candles[:3] if c['timestamp'] == candle['timestamp']), None)
+            if existing is None:
+                return
+            if all(existing[field] == value for field, value in candle.items()):
+                # Unchanged bar pushed again: nothing to recompute
+                return
+            existing.update(candle)
+            if existing is not candles[0]:
+                history_versions[symbol][timeframe] += 1
+
+        bump_version(symbol, timeframe)
+        calculate_indicators(symbol, timeframe)
+
+    except Exception as error:
+        print(f"Error applying kline: {error}")
+
 def update_candles(ticker_data):
     try:
         symbol = convert_symbol_format(ticker_data['s'], to_websocket=False)
@@ -283,20 +696,31 @@ def update_candles(ticker_data):
                     'close': close_price,
                     'volume': 0  # Volume not available in ticker data
                 }
-                candles.insert(0, new_candle)
+                skipped = bool(candles) and aligned_timestamp - candles[0]['timestamp'] > TIMEFRAME_MS[timeframe]
+                with store_lock:
+                    candles.insert(0, new_candle)
+                    bump_version(symbol, timeframe)
+                if skipped:
+                    gap_repairer.schedule(symbol, timeframe)
                 
                 # Calculate indicators for the new candle
                 calculate_indicators(symbol, timeframe)
                 
                 # Keep only last 500 candles
-                if len(candles) > 500:
-                    candles.pop()
+                if len(candles) > MAX_CANDLES:
+                    with store_lock:
+                        candles.pop()
             else:
                 # Update the current candle
                 current_candle = candles[0]
+                if (current_candle['close'] == close_price
+                        and current_candle['low'] <= close_price <= current_candle['high']):
+                    # Identical-price tick: nothing changed, nothing to recompute
+                    continue
                 current_candle['close'] = close_price
                 current_candle['high'] = max(current_candle['high'], close_price)
                 current_candle['low'] = min(current_candle['low'], close_price)
+                bump_version(symbol, timeframe)
                 
                 # Recalculate indicators for the updated candle
                 calculate_indicators(symbol, timeframe)
@@ -304,46 +728,93 @@ def update_candles(ticker_data):
     except Exception as error:
         print(f"Error updating candles: {error}")
 
+def build_indicator_messages(symbol, timeframe, config_names):
+    """Compute indicators for some configs of a stream and build their messages.
+
+    Returns [(config, snapshot key, JSON message)] and records the version each
+    config was brought up to.
+    """
+    import indicators
+
+    # Get candles for the symbol and timeframe
+    candles = candle_store[symbol][timeframe]
+    version = stream_versions[symbol][timeframe]
+
+    # Calculate WaveTrend + RSI for the requested configs in one pass
+    results = get_indicator_results(symbol, timeframe, list(config_names))
+    if not candles or not results:
+        return []
+
+    # Store results in the latest candle
+    default = results.get(indicators.DEFAULT_CONFIG)
+    if default:
+        candles[0]['wt1'] = default['wt1']
+        candles[0]['wt2'] = default['wt2']
+        candles[0]['rsi'] = default['rsi']
+
+    messages = []
+    for config_name, values in results.items():
+        signals = {
+            'type': 'indicators',
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'config': config_name,
+            'wt1': round(values['wt1'], 2),
+            'wt2': round(values['wt2'], 2),
+            'rsi': round(values['rsi'], 2) if values['rsi'] is not None else None,
+            'price': round(float(last_prices.get(symbol, candles[0]['close'])), 4),  # Latest traded price, else latest close
+            'timestamp': datetime.now().isoformat()
+        }
+        messages.append((config_name, (symbol, timeframe, config_name), json.dumps(signals)))
+        computed_versions[(symbol, timeframe, config_name)] = version
+    return messages
+
 def calculate_indicators(symbol, timeframe):
     try:
-        # Get candles for the symbol and timeframe
-        candles = candle_store[symbol][timeframe]
-
-        # Calculate WaveTrend
-        wt_results = indicators.indicators.calculate_wave_trend(candles)
-
-        # Calculate RSI
-        rsi_value = indicators.indicators.calculate_rsi(candles)
-
-        # Store results in the latest candle
-        if candles:
-            candles[0]['wt1'] = wt_results['wt1']
-            candles[0]['wt2'] = wt_results['wt2']
-            candles[0]['rsi'] = float(rsi_value.iloc[-1]) if not rsi_value.empty else None
-
-            # Create and broadcast WaveTrend message
-            signals = {
-                'type': 'indicators',
-                'symbol': symbol,
-                'timeframe': timeframe,
-                'wt1': round(wt_results['wt1'], 2),
-                'wt2': round(wt_results['wt2'], 2),
-                'rsi': round(float(rsi_value.iloc[-1]), 2) if not rsi_value.empty else None,
-                'price': round(float(candles[0]['close']), 4),  # Add current price from latest candle
-                'timestamp': datetime.now().isoformat()
-            }
+        config_names = wanted_configs(symbol, timeframe)
+        if not config_names:
+            # Nobody is watching: keep only the candles up to date. The
+            # indicators are computed when a client subscribes (refresh_streams).
+            return
 
-            # Broadcast using the server's event loop (thread-safe)
-            loop = websocket_server.get_event_loop()
+        # Broadcast using the server's event loop (thread-safe)
+        loop = websocket_server.get_event_loop()
+        for config_name, key, message in build_indicator_messages(symbol, timeframe, config_names):
             if loop and loop.is_running():
                 asyncio.run_coroutine_threadsafe(
-                    websocket_server.broadcast(json.dumps(signals)),
+                    websocket_server.broadcast(message, key=key, config=config_name),
                     loop
                 )
         
     except Exception as error:
         print(f"Error calculating indicators: {error}")
 
+def refresh_streams(pattern, config_names):
+    """Bring streams matching a new subscription up to date (worker thread).
+
+    Only the (stream, config) pairs whose last computation is older than the
+    stream's current version are recomputed; results go into the server's
+    snapshot, which is then sent to the subscribing client.
+    """
+    for symbol in SYMBOLS:
+        for timeframe in TIMEFRAMES:
+            if not websocket_server.stream_matches(pattern, symbol, timeframe):
+                continue
+            version = stream_versions[symbol][timeframe]
+            stale = [name for name in config_names
+                     if computed_versions.get((symbol, timeframe, name)) != version]
+            if not stale:
+                continue
+            try:
+                for config_name, key, message in build_indicator_messages(symbol, timeframe, stale):
+                    websocket_server.latest_messages[key] = message
+            except Exception as error:
+                print(f"Error refreshing indicators for {symbol} {timeframe}: {error}")
+
+websocket_server.refresh_hook = refresh_streams
+websocket_server.known_symbols = set(SYMBOLS)
+websocket_server.known_timeframes = set(TIMEFRAMES)
+
 # Main execution
 if __name__ == "__main__":
     # Fetch historical data for all symbols and timeframes
@@ -4,8 +4,12 @@ import json
 import logging
 import sys
 import os
+import threading
 from datetime import datetime
 
+import http_api
+import ws_compression
+
 # Configure logging to stdout
 logging.basicConfig(
     level=logging.INFO,
@@ -18,10 +22,220 @@ connected_clients = set()
 broadcast_lock = asyncio.Lock()
 _server_loop = None
 
+# Set once the listening socket is bound; main.py waits on this instead of
+# sleeping so the rest of startup (heavy imports, backfill) happens after bind.
+# Created on first use: on Python 3.9 an Event binds to the loop current at
+# creation, which at import time is not the loop asyncio.run() starts.
+_server_ready = None
+
+def get_server_ready():
+    """The server-bound event, created in the running loop"""
+    global _server_ready
+    if _server_ready is None:
+        _server_ready = asyncio.Event()
+    return _server_ready
+
+# Set by main.load_heavy_modules once indicators (and its registered configs)
+# has finished importing. Merely being in sys.modules is not enough: the
+# module is there from the moment its pandas import starts.
+numeric_ready = threading.Event()
+
+# Name of the indicator config legacy clients receive (see indicators.py)
+DEFAULT_CONFIG = 'default'
+
+# Indicator configs each client is subscribed to, and the reverse index used
+# by broadcast(). Clients that never send "configs" only get DEFAULT_CONFIG.
+client_configs = {}
+config_subscribers = {}
+
+# Streams each client wants, as a (symbols, timeframes) pattern where None
+# matches everything. Clients that never send "symbols"/"timeframes" get all
+# streams, like before subscriptions existed.
+ALL_STREAMS = (None, None)
+client_streams = {}
+
+# Aggregated client demand as [(symbols, timeframes, configs)], rebuilt when a
+# client connects, subscribes or leaves. Read by the feed thread to decide
+# which streams need indicator work.
+_demand = []
+
+# Installed by websocket_client: called in a worker thread with a client's
+# new (pattern, configs) so streams nobody was watching are brought up to
+# date before their snapshot is sent.
+refresh_hook = None
+
+# Installed by websocket_client: the symbols and timeframes the feed carries,
+# used to validate subscriptions (None accepts any name)
+known_symbols = None
+known_timeframes = None
+
+# Clients that subscribed with "batch": true get one
+# {"type": "batch", "messages": [...]} frame per tick instead of one frame per
+# update. Updates to the same stream within a tick collapse to the newest.
+BATCH_INTERVAL = float(os.environ.get('WS_BATCH_INTERVAL', 0.1))  # seconds
+batch_clients = set()
+_pending_batch = []  # (key, config, message) broadcast since the last flush
+
+# Last broadcast message per (symbol, timeframe, config). New clients get this snapshot
+# immediately, even while the numeric stack and backfill are still loading.
+latest_messages = {}
+
+# Optional on-disk copy of latest_messages (useful with a mounted volume so a
+# cold-started machine has something to serve before the first computation).
+SNAPSHOT_PATH = os.environ.get('SNAPSHOT_PATH')
+SNAPSHOT_SAVE_INTERVAL = 60  # seconds
+
 def get_event_loop():
     """Get the server's event loop for cross-thread calls"""
     return _server_loop
 
+def load_snapshot(path=None):
+    """Load the cached snapshot from disk into latest_messages"""
+    path = path or SNAPSHOT_PATH
+    if not path or not os.path.exists(path):
+        return 0
+    try:
+        with open(path) as f:
+            entries = json.load(f)
+        for entry in entries:
+            key = (entry['symbol'], entry['timeframe'], entry.get('config', DEFAULT_CONFIG))
+            latest_messages[key] = json.dumps(entry)
+        logger.info(f"Loaded {len(entries)} cached snapshot entries from {path}")
+        return len(entries)
+    except Exception as e:
+        logger.error(f"Error loading snapshot from {path}: {e}")
+        return 0
+
+def save_snapshot(path=None):
+    """Write latest_messages to disk (atomic replace)"""
+    path = path or SNAPSHOT_PATH
+    if not path or not latest_messages:
+        return
+    try:
+        entries = [json.loads(message) for message in list(latest_messages.values())]
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.error(f"Error saving snapshot to {path}: {e}")
+
+async def _snapshot_saver():
+    """Periodically persist the snapshot when SNAPSHOT_PATH is set"""
+    while True:
+        await asyncio.sleep(SNAPSHOT_SAVE_INTERVAL)
+        await asyncio.to_thread(save_snapshot)
+
+def stream_matches(pattern, symbol, timeframe):
+    """Whether a (symbols, timeframes) subscription pattern covers a stream"""
+    symbols, timeframes = pattern
+    return (symbols is None or symbol in symbols) and (timeframes is None or timeframe in timeframes)
+
+def _rebuild_demand():
+    global _demand
+    patterns = {}
+    for websocket, pattern in list(client_streams.items()):
+        patterns.setdefault(pattern, set()).update(client_configs.get(websocket, ()))
+    # Swap in a new list so readers on other threads never see a partial one
+    _demand = [(symbols, timeframes, frozenset(configs))
+               for (symbols, timeframes), configs in patterns.items() if configs]
+
+def demanded_configs(symbol, timeframe):
+    """Indicator configs that connected clients want for one stream"""
+    configs = set()
+    for symbols, timeframes, names in _demand:
+        if stream_matches((symbols, timeframes), symbol, timeframe):
+            configs |= names
+    return configs
+
+def parse_stream_names(value, known):
+    """Validate a subscribe "symbols"/"timeframes" value.
+
+    Returns (names, rejected). names is a frozenset of accepted names (empty
+    for an empty list, meaning all), or None when the value is unusable and
+    the client's current setting should stay; rejected is what was dropped.
+    """
+    if not isinstance(value, list):
+        return None, value
+    accepted = [name for name in value if isinstance(name, str) and (known is None or name in known)]
+    rejected = [name for name in value if name not in accepted]
+    if value and not accepted:
+        return None, rejected
+    return frozenset(accepted), rejected
+
+def set_client_streams(websocket, symbols=None, timeframes=None):
+    """Restrict a client to some symbols/timeframes (None or empty = all)"""
+    client_streams[websocket] = (
+        frozenset(symbols) if symbols else None,
+        frozenset(timeframes) if timeframes else None
+    )
+    _rebuild_demand()
+
+def known_configs(names):
+    """Split requested config names into (registered, unknown).
+
+    Before the numeric stack is loaded nothing is registered yet, so every
+    name is accepted.
+    """
+    if not numeric_ready.is_set():
+        return set(names), []
+    import indicators
+    known = {name for name in names if name in indicators.indicators.configs}
+    return known, sorted(set(names) - known)
+
+def set_client_configs(websocket, configs):
+    """Replace the set of indicator configs a client receives"""
+    for name in client_configs.get(websocket, ()):
+        subscribers = config_subscribers.get(name)
+        if subscribers is not None:
+            subscribers.discard(websocket)
+            if not subscribers:
+                del config_subscribers[name]
+    client_configs[websocket] = set(configs)
+    for name in configs:
+        config_subscribers.setdefault(name, set()).add(websocket)
+    _rebuild_demand()
+
+def set_client_batch(websocket, enabled):
+    """Switch a client between per-update frames and batched frames"""
+    if enabled:
+        batch_clients.add(websocket)
+    else:
+        batch_clients.discard(websocket)
+
+def add_client(websocket):
+    """Register a new client: all streams, default config"""
+    connected_clients.add(websocket)
+    client_streams[websocket] = ALL_STREAMS
+    set_client_configs(websocket, {DEFAULT_CONFIG})
+
+def remove_client(websocket):
+    """Drop all subscription state for a disconnected client"""
+    connected_clients.discard(websocket)
+    batch_clients.discard(websocket)
+    set_client_configs(websocket, ())
+    client_configs.pop(websocket, None)
+    client_streams.pop(websocket, None)
+    _rebuild_demand()
+
+async def refresh_client(websocket):
+    """Bring the streams a client wants up to date before its snapshot.
+
+    Streams nobody was watching only have candles. Until the numeric stack is
+    loaded (main.py) the cached snapshot is served as is.
+    """
+    if refresh_hook is None or not numeric_ready.is_set():
+        return
+    await asyncio.to_thread(refresh_hook, client_streams[websocket], set(client_configs[websocket]))
+
+async def send_snapshot(websocket):
+    """Send the cached latest value of every stream the client wants"""
+    configs = client_configs.get(websocket, {DEFAULT_CONFIG})
+    pattern = client_streams.get(websocket, ALL_STREAMS)
+    for (symbol, timeframe, config), message in list(latest_messages.items()):
+        if config in configs and stream_matches(pattern, symbol, timeframe):
+            await websocket.send(message)
+
 async def handle_client(websocket):
     """Handle individual client connections"""
     global _server_loop
@@ -29,7 +243,7 @@ async def handle_client(websocket):
 
     print(f"[WS] handle_client called!", flush=True)
     try:
-        connected_clients.add(websocket)
+        add_client(websocket)
         print(f"[WS] New client connected! Total: {len(connected_clients)}", flush=True)
         logger.info(f"New client connected from {websocket.remote_address}")
 
@@ -43,6 +257,12 @@ async def handle_client(websocket):
         except Exception as e:
             logger.error(f"Error sending welcome message: {e}")
 
+        try:
+            await refresh_client(websocket)
+            await send_snapshot(websocket)
+        except Exception as e:
+            logger.error(f"Error sending snapshot: {e}")
+
         try:
             async for message in websocket:
                 logger.info(f"Received message from client: {message}")
@@ -50,29 +270,86 @@ async def handle_client(websocket):
                 try:
                     data = json.loads(message)
                     if data.get("type") == "subscribe":
+                        rejected = {}
+                        if isinstance(data.get("configs"), list):
+                            configs, unknown = known_configs({str(name) for name in data["configs"]})
+                            set_client_configs(websocket, configs)
+                            if unknown:
+                                rejected["configs"] = unknown
+                        if "symbols" in data or "timeframes" in data:
+                            symbols, timeframes = client_streams[websocket]
+                            for field, known in (("symbols", known_symbols), ("timeframes", known_timeframes)):
+                                if field not in data:
+                                    continue
+                                names, bad = parse_stream_names(data[field], known)
+                                if bad:
+                                    rejected[field] = bad
+                                if names is None:
+                                    continue
+                                if field == "symbols":
+                                    symbols = names
+                                else:
+                                    timeframes = names
+                            set_client_streams(websocket, symbols, timeframes)
+                        if "batch" in data:
+                            set_client_batch(websocket, bool(data["batch"]))
+
+                        await refresh_client(websocket)
+
                         await websocket.send(json.dumps({
                             "type": "subscribed",
-                            "symbols": data.get("symbols", [])
+                            "symbols": sorted(client_streams[websocket][0] or ()),
+                            "timeframes": sorted(client_streams[websocket][1] or ()),
+                            "configs": sorted(client_configs.get(websocket, ())),
+                            "batch": websocket in batch_clients,
+                            "rejected": rejected
                         }))
+                        await send_snapshot(websocket)
                 except json.JSONDecodeError:
                     pass
+                except websockets.exceptions.ConnectionClosed:
+                    raise
+                except Exception as e:
+                    # One bad message must not drop the connection
+                    logger.error(f"Error handling message from client: {e}")
         except websockets.exceptions.ConnectionClosed as e:
             logger.info(f"Client connection closed: {e}")
         except Exception as e:
             logger.error(f"Error handling client message: {str(e)}")
         finally:
-            connected_clients.discard(websocket)
+            remove_client(websocket)
             print(f"[WS] Client disconnected. Total: {len(connected_clients)}", flush=True)
     except Exception as e:
         logger.error(f"Error in handle_client: {str(e)}")
         import traceback
         traceback.print_exc()
 
-async def broadcast(message):
-    """Broadcast message to all connected clients"""
-    if connected_clients:
+async def broadcast(message, key=None, config=DEFAULT_CONFIG):
+    """Broadcast message to the clients subscribed to its config and stream
+
+    When key is a (symbol, timeframe, config) tuple the message is also kept as
+    that stream's cached snapshot for clients that connect later.
+    """
+    if key is not None:
+        latest_messages[key] = message
+    if config_subscribers.get(config):
         # Make a copy to avoid modification during iteration
-        clients = set(connected_clients)
+        clients = set(config_subscribers[config])
+        if key is not None:
+            clients = {
+                client for client in clients
+                if stream_matches(client_streams.get(client, ALL_STREAMS), key[0], key[1])
+            }
+        if not clients:
+            return
+        if batch_clients:
+            batched = clients & batch_clients
+            if batched:
+                # Recipients are worked out again per group at flush time
+                _pending_batch.append((key, config, message))
+                clients -= batched
+            if not clients:
+                return
         logger.info(f"Broadcasting to {len(clients)} clients")
         try:
             # Use websockets.broadcast which handles multiple clients efficiently
@@ -80,6 +357,51 @@ async def broadcast(message):
         except Exception as e:
             logger.error(f"Broadcast error: {e}")
 
+def build_batch(messages):
+    """Wrap already serialized JSON messages in one batch message"""
+    return '{"type": "batch", "messages": [' + ', '.join(messages) + ']}'
+
+def flush_batches():
+    """Send pending updates to batch clients, one frame per client group.
+
+    Clients with the same configs and stream pattern get the same payload,
+    so it is serialized once per group (and, with WS_COMPRESSION=shared,
+    compressed once).
+    """
+    global _pending_batch
+    if not _pending_batch:
+        return 0
+    pending, _pending_batch = _pending_batch, []
+
+    groups = {}
+    for client in list(batch_clients):
+        signature = (frozenset(client_configs.get(client, ())), client_streams.get(client, ALL_STREAMS))
+        groups.setdefault(signature, []).append(client)
+
+    frames_sent = 0
+    for (configs, pattern), clients in groups.items():
+        messages = {}
+        for i, (key, config, message) in enumerate(pending):
+            if config not in configs:
+                continue
+            if key is not None and not stream_matches(pattern, key[0], key[1]):
+                continue
+            # Newest update per stream wins; unkeyed messages are all kept
+            messages[key if key is not None else i] = message
+        if messages:
+            websockets.broadcast(clients, build_batch(messages.values()))
+            frames_sent += len(clients)
+    return frames_sent
+
+async def _batch_flusher():
+    """Flush batched updates every BATCH_INTERVAL seconds"""
+    while True:
+        await asyncio.sleep(BATCH_INTERVAL)
+        try:
+            flush_batches()
+        except Exception as e:
+            logger.error(f"Batch flush error: {e}")
+
 async def start_server(port=None, host='0.0.0.0'):
     """Start the WebSocket server"""
     global _server_loop
@@ -89,13 +411,29 @@ async def start_server(port=None, host='0.0.0.0'):
     if port is None:
         port = int(os.environ.get('PORT', 8080))
 
+    load_snapshot()
+
     server = await websockets.serve(
         handle_client,
         host,
         port,
         ping_interval=20,
         ping_timeout=60,
+        # Plain HTTP GETs under /api are answered by the query API
+        process_request=http_api.process_request,
+        # WS_COMPRESSION: deflate (default), shared or none
+        **ws_compression.serve_kwargs(),
     )
     logger.info(f"WebSocket server is listening on ws://{host}:{port}")
     print(f"[WS] WebSocket server started on ws://{host}:{port}", flush=True)
-    await server.wait_closed()
+    get_server_ready().set()
+
+    saver_task = asyncio.create_task(_snapshot_saver()) if SNAPSHOT_PATH else None
+    flusher_task = asyncio.create_task(_batch_flusher())
+    try:
+        await server.wait_closed()
+    finally:
+        flusher_task.cancel()
+        if saver_task:
+            saver_task.cancel()
+        save_snapshot()
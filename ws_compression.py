@@ -0,0 +1,104 @@
+"""permessage-deflate with compressed frames shared across connections.
+
+The websockets default compresses every message once per connection, with
+a per-connection sliding window (context takeover), so a broadcast to 1000
+clients runs deflate 1000 times on the same payload. In "shared" mode the
+server negotiates server_no_context_takeover: each message is compressed
+on its own, so identical payloads under identical settings produce
+identical frames, and the first connection's output is reused by the rest.
+
+Select with WS_COMPRESSION:
+    deflate  websockets default, per-connection context (the default)
+    shared   no context takeover, one compression per payload and settings
+    none     no compression
+"""
+import os
+from collections import OrderedDict
+
+from websockets import frames
+from websockets.extensions.permessage_deflate import (
+    PerMessageDeflate,
+    ServerPerMessageDeflateFactory,
+)
+
+COMPRESSION_MODES = ['deflate', 'shared', 'none']
+WS_COMPRESSION = os.environ.get('WS_COMPRESSION', 'deflate')
+
+# Same window and memory settings as the websockets default
+SERVER_MAX_WINDOW_BITS = 12
+CLIENT_MAX_WINDOW_BITS = 12
+COMPRESS_SETTINGS = {'memLevel': 5}
+
+# Compressed payloads by (window bits, payload). A broadcast reuses the entry
+# within one call; the rest of the capacity serves snapshots to new clients.
+FRAME_CACHE_SIZE = 4096
+_frame_cache = OrderedDict()
+_stats = {'messages': 0, 'compressed': 0, 'shared': 0, 'bytes_in': 0, 'bytes_out': 0}
+
+class SharedPerMessageDeflate(PerMessageDeflate):
+    """PerMessageDeflate without server context takeover that reuses frames"""
+
+    def encode(self, frame):
+        # Control frames, fragments and non-bytes payloads take the normal path
+        if (frame.opcode in frames.CTRL_OPCODES or frame.opcode is frames.OP_CONT
+                or not frame.fin or not isinstance(frame.data, bytes)):
+            return super().encode(frame)
+
+        _stats['messages'] += 1
+        _stats['bytes_in'] += len(frame.data)
+        key = (self.local_max_window_bits, frame.data)
+        data = _frame_cache.get(key)
+        if data is None:
+            encoded = super().encode(frame)
+            data = encoded.data
+            _frame_cache[key] = data
+            if len(_frame_cache) > FRAME_CACHE_SIZE:
+                _frame_cache.popitem(last=False)
+            _stats['compressed'] += 1
+        else:
+            _frame_cache.move_to_end(key)
+            encoded = frames.Frame(frame.opcode, data, frame.fin, True, frame.rsv2, frame.rsv3)
+            _stats['shared'] += 1
+        _stats['bytes_out'] += len(data)
+        return encoded
+
+class SharedDeflateFactory(ServerPerMessageDeflateFactory):
+    """Server factory that always negotiates server_no_context_takeover"""
+
+    def __init__(self, **kwargs):
+        super().__init__(server_no_context_takeover=True, **kwargs)
+
+    def process_request_params(self, params, accepted_extensions):
+        response, extension = super().process_request_params(params, accepted_extensions)
+        return response, SharedPerMessageDeflate(
+            extension.remote_no_context_takeover,
+            extension.local_no_context_takeover,
+            extension.remote_max_window_bits,
+            extension.local_max_window_bits,
+            extension.compress_settings,
+        )
+
+def serve_kwargs(mode=None):
+    """Keyword arguments for websockets.serve for a compression mode"""
+    mode = mode or WS_COMPRESSION
+    if mode == 'none':
+        return {'compression': None}
+    if mode == 'shared':
+        return {
+            'compression': None,
+            'extensions': [SharedDeflateFactory(
+                server_max_window_bits=SERVER_MAX_WINDOW_BITS,
+                client_max_window_bits=CLIENT_MAX_WINDOW_BITS,
+                compress_settings=COMPRESS_SETTINGS,
+            )],
+        }
+    if mode != 'deflate':
+        raise ValueError(f"WS_COMPRESSION must be one of {', '.join(COMPRESSION_MODES)}")
+    return {'compression': 'deflate'}
+
+def stats():
+    """Shared compression counters (all zero unless mode is 'shared')"""
+    result = dict(_stats)
+    result['cached_frames'] = len(_frame_cache)
+    result['ratio'] = round(_stats['bytes_out'] / _stats['bytes_in'], 3) if _stats['bytes_in'] else None
+    return result